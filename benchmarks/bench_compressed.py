@@ -0,0 +1,85 @@
+"""
+Compares parsing a compressed output file by decompressing it to disk first against streaming it into the parser.
+
+Both the full parse and an early-stopping parse (basis sets only, as for `-a` and `-b`) are measured. Peak memory
+counts the Python allocations (tracemalloc), decompression buffers included; the memory-mapped pages of the
+decompressed copy, written to disk by the first workflow, are not counted.
+
+Usage: python benchmarks/bench_compressed.py [N_ATOMS] [NOISE_LINES]
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import bz2
+import gzip
+import lzma
+import shutil
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from compression import open_decompressed
+from output_parser import OutputParser, OutputRegion
+
+
+COMPRESSORS = {"gz": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+BASIS_SET_REGIONS = {OutputRegion.PseudoRegion, OutputRegion.GhostRegion, OutputRegion.BasisSetRegion}
+
+
+def parse(filepath: Path, regions: set[OutputRegion]) -> OutputParser:
+    parser = OutputParser(regions)
+    try:
+        parser.feed_file(filepath)
+    except StopIteration:
+        pass
+    return parser
+
+
+def decompress_then_parse(filepath: Path, regions: set[OutputRegion]) -> OutputParser:
+    plain = filepath.with_suffix(".plain")
+    with open_decompressed(filepath) as source, open(plain, "wb") as target:
+        shutil.copyfileobj(source, target)
+    parser = parse(plain, regions)
+    plain.unlink()
+    return parser
+
+
+def measured(function, filepath: Path, regions: set[OutputRegion]) -> tuple[float, float, OutputParser]:
+    tracemalloc.start()
+    t0 = perf_counter()
+    parser = function(filepath, regions)
+    elapsed = perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024**2, parser
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    noise_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms, noise_lines)
+        print(f"File: {n_atoms} atoms, {noise_lines} noise lines, {filepath.stat().st_size / 1024**2:.1f} MB")
+        print(f"{'format':<8}{'regions':<12}{'decompress + parse':>24}{'stream':>24}{'same':>7}")
+        for extension, opener in COMPRESSORS.items():
+            archive = filepath.with_suffix(f".out.{extension}")
+            with open(filepath, "rb") as source, opener(archive, "wb") as target:
+                shutil.copyfileobj(source, target)
+            for name, regions in (("all", set(OutputRegion)), ("basis sets", BASIS_SET_REGIONS)):
+                disk_time, disk_peak, disk_parser = measured(decompress_then_parse, archive, regions)
+                stream_time, stream_peak, stream_parser = measured(parse, archive, regions)
+                same = (disk_parser.atoms == stream_parser.atoms
+                        and disk_parser.mulliken_sums == stream_parser.mulliken_sums
+                        and disk_parser.mulliken_diffs == stream_parser.mulliken_diffs)
+                print(f"{extension:<8}{name:<12}"
+                      f"{disk_time * 1000:>10.1f} ms {disk_peak:>8.1f} MB"
+                      f"{stream_time * 1000:>10.1f} ms {stream_peak:>8.1f} MB{str(same):>7}")
+            archive.unlink()
+
+
+if __name__ == "__main__":
+    main()
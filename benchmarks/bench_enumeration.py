@@ -0,0 +1,44 @@
+"""
+Times the enumeration of ranges of atoms of increasing size, checking that the cost per atom stays flat.
+
+Usage: python benchmarks/bench_enumeration.py [MAX_ATOMS]
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from arguments import RangeArgument
+from bootstrap import init_resources
+from output_parser import OutputParser
+from printer import Printer
+
+
+def main() -> None:
+    max_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", max_atoms)
+        parser = OutputParser()
+        parser.feed_file(filepath)
+    with redirect_stdout(StringIO()):
+        printer = Printer(parser.build())
+
+    print(f"{'Atoms':>8} {'Time (ms)':>12} {'µs / atom':>12}")
+    n = max_atoms // 16
+    while n <= max_atoms:
+        with redirect_stdout(StringIO()):
+            t0 = perf_counter()
+            printer.parse_argument(RangeArgument(f"1-{n}"))
+            elapsed = perf_counter() - t0
+        print(f"{n:>8} {elapsed * 1000:>12.1f} {elapsed / n * 1e6:>12.1f}")
+        n *= 2
+
+
+if __name__ == "__main__":
+    main()
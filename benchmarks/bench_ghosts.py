@@ -0,0 +1,40 @@
+"""
+Times the parsing of the basis set region of outputs with an increasing number of ghost atoms and ECP basis sets.
+
+Usage: python benchmarks/bench_ghosts.py [MAX_GHOSTS]
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from output_parser import OutputParser, OutputRegion
+
+
+def main() -> None:
+    max_ghosts = int(sys.argv[1]) if len(sys.argv) > 1 else 16000
+    init_resources()
+    basis_regions = {OutputRegion.PseudoRegion, OutputRegion.GhostRegion, OutputRegion.BasisSetRegion}
+
+    print(f"{'Atoms':>8} {'Ghosts':>8} {'Time (ms)':>12} {'µs / atom':>12}")
+    ghosts = max_ghosts // 16
+    with TemporaryDirectory() as directory:
+        while ghosts <= max_ghosts:
+            n_atoms = 2 * ghosts
+            filepath = write_output(Path(directory) / "bench.out", n_atoms, ghosts=ghosts, ecp=True)
+            parser = OutputParser(basis_regions)
+            t0 = perf_counter()
+            try:
+                parser.feed_file(filepath)
+            except StopIteration:
+                pass
+            elapsed = perf_counter() - t0
+            print(f"{n_atoms:>8} {ghosts:>8} {elapsed * 1000:>12.1f} {elapsed / n_atoms * 1e6:>12.1f}")
+            ghosts *= 2
+
+
+if __name__ == "__main__":
+    main()
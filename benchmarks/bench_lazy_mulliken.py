@@ -0,0 +1,67 @@
+"""
+Compares parsing, building and printing the tables of a few atoms with the Mulliken populations parsed in full
+against populations left in the output file and decoded when printed (lazy mode), in time and peak memory
+(tracemalloc, separate run), and checks that both print the same tables.
+
+Usage: python benchmarks/bench_lazy_mulliken.py [N_ATOMS] [REQUEST]
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from arguments import ArgumentHandler
+from bootstrap import init_resources
+from output_parser import OutputParser
+from printer import Printer
+
+
+def run(filepath: Path, request: list[str], lazy: bool) -> str:
+    arguments = ArgumentHandler([str(filepath), *request])
+    plan = arguments.query_plan
+    parser = OutputParser(plan.regions, plan=plan, lazy=lazy)
+    try:
+        parser.feed_file(filepath)
+    except StopIteration:
+        pass
+    rendered = StringIO()
+    Printer(parser.build()).write_requests(arguments.args, rendered, False)
+    return rendered.getvalue()
+
+
+def measured(filepath: Path, request: list[str], lazy: bool) -> tuple[float, float, str]:
+    t0 = perf_counter()
+    rendered = run(filepath, request, lazy)
+    elapsed = perf_counter() - t0
+    tracemalloc.start()
+    run(filepath, request, lazy)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024**2, rendered
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    request = sys.argv[2].split() if len(sys.argv) > 2 else ["-a", "20000-20020"]
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms)
+        print(f"File: {n_atoms} atoms, {filepath.stat().st_size / 1024**2:.1f} MB - request: {' '.join(request)}")
+        # the log of the parser is not part of the measures
+        with redirect_stdout(StringIO()):
+            eager_time, eager_peak, eager = measured(filepath, request, False)
+            lazy_time, lazy_peak, lazy = measured(filepath, request, True)
+    print(f"{'populations':<14}{'time':>12}{'peak':>12}")
+    print(f"{'parsed':<14}{eager_time * 1000:>9.1f} ms{eager_peak:>9.1f} MB")
+    print(f"{'lazy':<14}{lazy_time * 1000:>9.1f} ms{lazy_peak:>9.1f} MB")
+    print(f"Speedup: {eager_time / lazy_time:.2f}x - same tables: {eager == lazy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares the cascaded `re.findall` line classification against the single-pass classifier of `OutputParser`,
+in lines per second for the lines of each output region.
+
+Usage: python benchmarks/bench_line_classifier.py [N_ATOMS]
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import re
+import sys
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from output_parser import LineType, OutputParser, OutputRegion
+
+
+# patterns of the cascaded classifier
+ATOM_REGEX = re.compile(r"\s+(\d+)\s+(\w+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)")
+FUNCTION_REGEX = re.compile(r"^\s+(\d+)?-?\s+(\d+)\s(\w+)\s+$")
+PRIMITIVE_REGEX = re.compile(r"\s?(-?\d\.\d+E[+-]\d\d)")
+MULLIKEN_ATOM_REGEX = re.compile(r"\s+(\d+)\s+")
+MULLIKEN_FLOAT3_REGEX = re.compile(r"[+-]?\d+\.\d{3}")
+
+
+def cascaded_line_type(region: OutputRegion, line: str) -> tuple[LineType, tuple]:
+    # one re.findall per pattern until one matches, as the parser did before
+    if region == OutputRegion.BasisSetRegion:
+        if atom_match := re.findall(ATOM_REGEX, line):
+            return LineType.AtomLine, atom_match[0]
+        elif function_match := re.findall(FUNCTION_REGEX, line):
+            return LineType.BasisFunctionLine, (function_match[0][-1],)
+        elif primitive_match := re.findall(PRIMITIVE_REGEX, line):
+            return LineType.PrimitiveFunctionLine, tuple(primitive_match)
+    else:
+        if atom_match := re.findall(MULLIKEN_ATOM_REGEX, line):
+            orbital_match = re.findall(MULLIKEN_FLOAT3_REGEX, line)
+            return LineType.MullikenAtom, tuple(atom_match + orbital_match)
+        elif orbital_match := re.findall(MULLIKEN_FLOAT3_REGEX, line):
+            return LineType.MullikenOrbitals, tuple(orbital_match)
+    return LineType.Nothing, ()
+
+
+def region_lines(filepath: Path) -> dict[OutputRegion, list[str]]:
+    # lines of the basis set region and of the first α+β Mulliken population
+    lines = filepath.read_text(encoding="utf-8").splitlines()
+    start = next(i for i, line in enumerate(lines) if "LOCAL ATOMIC FUNCTIONS BASIS SET" in line)
+    end = next(i for i in range(start, len(lines)) if "INFORMATION" in lines[i])
+    basis_set = lines[start + 1:end]
+    start = next(i for i, line in enumerate(lines) if "CHARGE  A.O. POPULATION" in line) + 2
+    end = next(i for i in range(start, len(lines)) if not lines[i].strip())
+    return {OutputRegion.BasisSetRegion: basis_set, OutputRegion.MullikenSumValues: lines[start:end]}
+
+
+def timed(classify, lines: list[str]) -> tuple[float, list]:
+    t0 = perf_counter()
+    results = [classify(line) for line in lines]
+    return perf_counter() - t0, results
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms, ecp=True)
+        regions = region_lines(filepath)
+
+    print(f"File: {n_atoms} atoms")
+    print(f"{'region':<20}{'lines':>10}{'cascaded':>16}{'single pass':>16}{'speedup':>10}{'same':>7}")
+    for region, lines in regions.items():
+        parser = OutputParser()
+        parser.current_output_region = region
+        cascaded_time, cascaded = timed(lambda line: cascaded_line_type(region, line), lines)
+        single_time, single = timed(parser._get_line_type, lines)
+        same = cascaded == [(match.line_type, tuple(match.content)) for match in single]
+        print(f"{region.name:<20}{len(lines):>10}"
+              f"{len(lines) / cascaded_time:>12.0f} l/s{len(lines) / single_time:>12.0f} l/s"
+              f"{cascaded_time / single_time:>9.1f}x{str(same):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Reports the memory retained by the parsed output object, in bytes per atom, for the object and columnar backends.
+
+Usage: python benchmarks/bench_memory.py [N_ATOMS]
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import gc
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from output_parser import OutputParser
+
+
+def retained_bytes(filepath: Path, columnar: bool) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    parser = OutputParser()
+    parser.feed_file(filepath)
+    with redirect_stdout(StringIO()):
+        output = parser.build(columnar)
+    _, peak = tracemalloc.get_traced_memory()
+    del parser
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del output
+    return current, peak
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms)
+        print(f"{'Backend':<10} {'Retained (MB)':>14} {'Peak (MB)':>10} {'Bytes / atom':>13}")
+        for name, columnar in (("objects", False), ("columnar", True)):
+            current, peak = retained_bytes(filepath, columnar)
+            print(f"{name:<10} {current / 1024**2:>14.1f} {peak / 1024**2:>10.1f} {current / n_atoms:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures the parsing time of an output file with the Mulliken Population blocks split across 1, 2, 4, 8 and 16
+worker processes (`--jobs`), and checks that every run gives the same populations as the serial parse.
+
+Usage: python benchmarks/bench_parallel_mulliken.py [N_ATOMS] [STEPS]
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import os
+import sys
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from columnar_output import MullikenTrajectory
+from output_parser import OutputParser
+
+
+WORKERS = (1, 2, 4, 8, 16)
+
+
+def parse(filepath: Path, workers: int) -> tuple[float, MullikenTrajectory]:
+    parser = OutputParser(trajectory=True, workers=workers)
+    t0 = perf_counter()
+    parser.feed_file(filepath)
+    parser._finish_mulliken_step()
+    return perf_counter() - t0, parser.trajectory
+
+
+def same_populations(a: MullikenTrajectory, b: MullikenTrajectory) -> bool:
+    return (a.steps == b.steps and a.offsets == b.offsets and a.sum_charges == b.sum_charges and a.sums == b.sums
+            and a.diff_charges == b.diff_charges and a.diffs == b.diffs)
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms, steps=steps)
+        print(f"File: {n_atoms} atoms, {steps} open-shell steps, {filepath.stat().st_size / 1024**2:.1f} MB "
+              f"({os.process_cpu_count()} CPUs)")
+        print(f"{'workers':>8}{'time':>14}{'speedup':>10}{'same':>7}")
+        serial_time, serial = parse(filepath, 1)
+        for workers in WORKERS:
+            elapsed, trajectory = (serial_time, serial) if workers == 1 else parse(filepath, workers)
+            print(f"{workers:>8}{elapsed * 1000:>11.1f} ms{serial_time / elapsed:>9.2f}x"
+                  f"{str(same_populations(serial, trajectory)):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares parsing and building an output file for every atom against a query plan restricted to a few atoms
+(e.g. `812` or `800-820`), in time and peak memory (tracemalloc, separate run), and checks that the planned atoms
+get the same coordinates and populations.
+
+Usage: python benchmarks/bench_query_plan.py [N_ATOMS] [PLANNED_ATOMS]
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from crystal_output import CrystalOutput
+from output_parser import OutputParser, OutputRegion, QueryPlan
+
+
+def load(filepath: Path, plan: QueryPlan) -> CrystalOutput:
+    parser = OutputParser(plan.regions, plan=plan)
+    try:
+        parser.feed_file(filepath)
+    except StopIteration:
+        pass
+    return parser.build()
+
+
+def measured(filepath: Path, plan: QueryPlan) -> tuple[float, float, CrystalOutput]:
+    t0 = perf_counter()
+    output = load(filepath, plan)
+    elapsed = perf_counter() - t0
+    tracemalloc.start()
+    load(filepath, plan)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024**2, output
+
+
+def same_atoms(full: CrystalOutput, planned: CrystalOutput, labels: frozenset[int]) -> bool:
+    for atom, planned_atom in zip(full.atoms, planned.atoms):
+        if atom.label in labels and ((atom.x, atom.y, atom.z) != (planned_atom.x, planned_atom.y, planned_atom.z)
+                                     or atom.mulliken.alpha_charge != planned_atom.mulliken.alpha_charge
+                                     or list(atom.mulliken.orbitals) != list(planned_atom.mulliken.orbitals)):
+            return False
+    return True
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    planned_atoms = int(sys.argv[2]) if len(sys.argv) > 2 else 21
+    init_resources()
+    regions = frozenset(OutputRegion)
+    first = n_atoms // 2
+    labels = frozenset(range(first, first + planned_atoms))
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms)
+        print(f"File: {n_atoms} atoms, {filepath.stat().st_size / 1024**2:.1f} MB - planned atoms: {first}-{first + planned_atoms - 1}")
+        # the log of the parser is not part of the measures
+        with redirect_stdout(StringIO()):
+            full_time, full_peak, full = measured(filepath, QueryPlan(regions))
+            plan_time, plan_peak, planned = measured(filepath, QueryPlan(regions, labels))
+    print(f"{'plan':<14}{'time':>12}{'peak':>12}")
+    print(f"{'every atom':<14}{full_time * 1000:>9.1f} ms{full_peak:>9.1f} MB")
+    print(f"{'planned atoms':<14}{plan_time * 1000:>9.1f} ms{plan_peak:>9.1f} MB")
+    print(f"Speedup: {full_time / plan_time:.2f}x - same planned atoms: {same_atoms(full, planned, labels)}")
+
+
+if __name__ == "__main__":
+    main()
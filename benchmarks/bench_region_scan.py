@@ -0,0 +1,62 @@
+"""
+Compares the line-by-line feed of an output file against the memory-mapped region pre-scan.
+
+Usage: python benchmarks/bench_region_scan.py [N_ATOMS] [NOISE_LINES]
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from output_parser import OutputParser
+
+
+def feed_lines(filepath: Path) -> OutputParser:
+    parser = OutputParser()
+    with open(filepath, "r", encoding="utf-8") as file:
+        for line in file:
+            parser.feed(line.strip("\n"))
+    return parser
+
+
+def feed_regions(filepath: Path) -> OutputParser:
+    parser = OutputParser()
+    parser.feed_file(filepath)
+    return parser
+
+
+def timed(function, filepath: Path) -> tuple[float, OutputParser]:
+    t0 = perf_counter()
+    parser = function(filepath)
+    return perf_counter() - t0, parser
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    noise_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms, noise_lines)
+        size_mb = filepath.stat().st_size / 1024**2
+
+        line_time, line_parser = timed(feed_lines, filepath)
+        region_time, region_parser = timed(feed_regions, filepath)
+
+    same = (line_parser.atoms == region_parser.atoms
+            and line_parser.basis_sets == region_parser.basis_sets
+            and line_parser.mulliken_sums == region_parser.mulliken_sums
+            and line_parser.mulliken_diffs == region_parser.mulliken_diffs)
+
+    print(f"File: {n_atoms} atoms, {noise_lines} noise lines, {size_mb:.1f} MB")
+    print(f"Line loop:        {line_time * 1000:10.1f} ms")
+    print(f"Region pre-scan:  {region_time * 1000:10.1f} ms")
+    print(f"Speedup:          {line_time / region_time:10.1f}x")
+    print(f"Identical state:  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Times the stages of a script call on a synthetic output file: resource bootstrap, `OutputParser.feed_file`,
+`OutputParser.build` and the rendering of the requested tables by `Printer`.
+
+Throughput is given in lines/s and MB/s of the output file (rendered tables for the rendering stage). Each stage
+is timed `--repeats` times and the best time is kept. Peak memory counts the Python allocations (tracemalloc) of a
+separate, untimed run (not the bootstrap, done once); the memory-mapped pages of the output file are not
+counted.
+
+With `--save`, the results are stored as the baseline; otherwise they are compared against the stored baseline, if
+any, and the script exits with status 1 if a stage got slower than `--tolerance`.
+
+Usage: python benchmarks/bench_stages.py [N_ATOMS] [NOISE_LINES] [options]
+"""
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Iterator, Optional
+import argparse
+import json
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from arguments import ArgumentHandler
+from bootstrap import init_resources
+from output_parser import OutputParser
+from printer import Printer
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "stages_baseline.json"
+DEFAULT_REQUEST = "-a -b 1-100"
+STAGES = ("bootstrap", "feed", "build", "render")
+
+
+class StageTimer:
+    # best time over the repeats and traced peak of each stage
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self.peaks: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        t0 = perf_counter()
+        yield
+        elapsed = perf_counter() - t0
+        if tracing:
+            self.peaks[name] = tracemalloc.get_traced_memory()[1] / 1024**2
+        else:
+            self.timings[name] = min(self.timings.get(name, elapsed), elapsed)
+
+
+def run_stages(filepath: Path, request: list[str], timer: StageTimer) -> str:
+    # one feed, build and render of the output file, as in a script call
+    arguments = ArgumentHandler([str(filepath), *request])
+    parser = OutputParser(arguments.required_regions, arguments.trajectory)
+    rendered = StringIO()
+    with timer.stage("feed"):
+        try:
+            parser.feed_file(filepath)
+        except StopIteration:
+            pass
+    with timer.stage("build"):
+        output_obj = parser.build(arguments.columnar)
+    with timer.stage("render"):
+        Printer(output_obj).write_requests(arguments.args, rendered, False)
+    return rendered.getvalue()
+
+
+def measure(filepath: Path, request: list[str], repeats: int) -> dict[str, dict[str, float]]:
+    timer = StageTimer()
+    # the log of the parser and of the argument handler is not part of the measures
+    with redirect_stdout(StringIO()):
+        with timer.stage("bootstrap"):
+            init_resources()
+        for _ in range(repeats):
+            rendered = run_stages(filepath, request, timer)
+        tracemalloc.start()
+        run_stages(filepath, request, timer)
+        tracemalloc.stop()
+
+    size = filepath.stat().st_size
+    with open(filepath, "rb") as file:
+        lines = sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1024 * 1024), b""))
+    volumes = {"feed": (lines, size), "build": (lines, size),
+               "render": (rendered.count("\n"), len(rendered.encode("utf-8")))}
+
+    results = {}
+    for stage in STAGES:
+        result = {"time": timer.timings[stage]}
+        if stage in timer.peaks:
+            result["peak"] = timer.peaks[stage]
+        if stage in volumes:
+            stage_lines, stage_bytes = volumes[stage]
+            result["lines_per_s"] = stage_lines / timer.timings[stage]
+            result["mb_per_s"] = stage_bytes / 1024**2 / timer.timings[stage]
+        results[stage] = result
+    return results
+
+
+def print_results(results: dict[str, dict[str, float]], baseline: Optional[dict], tolerance: float) -> bool:
+    # returns whether a stage is slower than the baseline
+    regression = False
+    print(f"{'stage':<11}{'time':>12}{'lines/s':>14}{'MB/s':>10}{'peak':>12}" + (f"{'baseline':>12}{'ratio':>9}" if baseline else ""))
+    for stage, result in results.items():
+        row = f"{stage:<11}{result['time'] * 1000:>9.1f} ms"
+        row += f"{result['lines_per_s']:>14.0f}{result['mb_per_s']:>10.1f}" if "lines_per_s" in result else f"{'-':>14}{'-':>10}"
+        row += f"{result['peak']:>9.1f} MB" if "peak" in result else f"{'-':>12}"
+        if baseline and stage in baseline["stages"]:
+            reference = baseline["stages"][stage]["time"]
+            ratio = result["time"] / reference
+            slower = ratio > 1 + tolerance
+            regression |= slower
+            row += f"{reference * 1000:>9.1f} ms{ratio:>8.2f}x" + (" slower" if slower else "")
+        print(row)
+    return regression
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Times the stages of a script call on a synthetic output file.")
+    parser.add_argument("n_atoms", type=int, nargs="?", default=20_000)
+    parser.add_argument("noise_lines", type=int, nargs="?", default=100_000, help="SCF cycles before each Mulliken population")
+    parser.add_argument("--closed-shell", action="store_true")
+    parser.add_argument("--ghosts", type=int, default=0)
+    parser.add_argument("--ecp", action="store_true")
+    parser.add_argument("--steps", type=int, default=1)
+    parser.add_argument("--shells", type=lambda value: value.upper().split(","), help="e.g. S,SP,P,D,F,G")
+    parser.add_argument("--request", default=DEFAULT_REQUEST, help=f"script arguments (default: {DEFAULT_REQUEST})")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="slowdown reported as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    configuration = {"n_atoms": args.n_atoms, "noise_lines": args.noise_lines, "open_shell": not args.closed_shell,
+                     "ghosts": args.ghosts, "ecp": args.ecp, "steps": args.steps, "shells": args.shells,
+                     "request": args.request}
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", args.n_atoms, args.noise_lines, not args.closed_shell,
+                                args.ghosts, args.ecp, steps=args.steps, shells=args.shells)
+        print(f"File: {args.n_atoms} atoms, {args.noise_lines} noise lines, {filepath.stat().st_size / 1024**2:.1f} MB"
+              f" - request: {args.request}")
+        results = measure(filepath, args.request.split(), args.repeats)
+
+    if args.save:
+        args.baseline.write_text(json.dumps({"configuration": configuration, "stages": results}, indent=2) + "\n")
+        print_results(results, None, args.tolerance)
+        print(f"Baseline stored in {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if baseline and baseline["configuration"] != configuration:
+        print(f"Ignoring the baseline {args.baseline}: measured on another output file or request")
+        baseline = None
+    if print_results(results, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Measures the start-up cost paid by every script call: interpreter start, imports and resource bootstrap.
+
+Usage: python benchmarks/bench_startup.py [REPEATS]
+"""
+from pathlib import Path
+from statistics import mean
+from time import perf_counter
+import subprocess
+import sys
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import bootstrap
+
+
+BOOTSTRAP = "import bootstrap; bootstrap.init_resources()"
+
+
+def run_interpreter(code: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        t0 = perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, check=True)
+        timings.append(perf_counter() - t0)
+    return mean(timings)
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    bare = run_interpreter("pass", repeats)
+    bootstrap.COMPILED_RESOURCES.unlink(missing_ok=True)
+    cold = run_interpreter(f"{BOOTSTRAP}; bootstrap.COMPILED_RESOURCES.unlink()", repeats)
+    warm = run_interpreter(BOOTSTRAP, repeats)
+
+    print(f"Mean of {repeats} interpreter starts")
+    print(f"Bare interpreter:                  {bare * 1000:8.1f} ms")
+    print(f"Bootstrap from YAML files:         {cold * 1000:8.1f} ms")
+    print(f"Bootstrap from compiled resources: {warm * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares rendering the atoms table with `Row`/`Cell` objects against tuple rows rendered by a compiled `RowLayout`.
+
+Usage: python benchmarks/bench_table.py [N_ROWS]
+"""
+from decimal import Decimal
+from io import StringIO
+from time import perf_counter
+import random
+import sys
+
+import synthetic  # noqa: F401, puts src/ on sys.path
+
+from printer import Printer
+from table import Table, Header, Row, Cell, CellAlignment, CellContentType
+
+
+def header() -> Header:
+    return Header([Row([Cell(f"column {i}", size=size) for i, size in enumerate((6, 12, 12, 12, 12, 16))])])
+
+
+def values(n_rows: int) -> list[tuple]:
+    rng = random.Random(0)
+    rows = []
+    for label in range(1, n_rows + 1):
+        x, y, z = (Decimal(f"{rng.uniform(-20, 20):.3f}") for _ in range(3))
+        rows.append((label, rng.choice(("O", "Mg", "Ag")), x, y, z, f"{label * 14 - 13: d}-{label * 14}"))
+    return rows
+
+
+def cell_rows(rows: list[tuple]):
+    for label, symbol, x, y, z, orbitals in rows:
+        yield Row([
+            Cell(label, content_type=CellContentType.DIGIT, alignment=CellAlignment.LEFT, size=6),
+            Cell(symbol, alignment=CellAlignment.CENTER, size=12),
+            Cell(x, CellContentType.DECIMAL, CellAlignment.CENTER_SPACE_PADDING, size=12, precision=3),
+            Cell(y, CellContentType.DECIMAL, CellAlignment.CENTER_SPACE_PADDING, size=12, precision=3),
+            Cell(z, CellContentType.DECIMAL, CellAlignment.CENTER_SPACE_PADDING, size=12, precision=3),
+            Cell(orbitals, alignment=CellAlignment.RIGHT, size=16)
+        ])
+
+
+def timed(table: Table) -> tuple[float, str]:
+    stream = StringIO()
+    t0 = perf_counter()
+    table.write(stream)
+    return perf_counter() - t0, stream.getvalue()
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = values(n_rows)
+
+    cell_time, cell_text = timed(Table(header(), cell_rows(rows)))
+    layout_time, layout_text = timed(Table(header(), iter(rows), Printer.ATOM_LAYOUT))
+
+    print(f"Rows: {n_rows}")
+    print(f"Row/Cell objects: {cell_time * 1000:10.1f} ms")
+    print(f"Compiled layout:  {layout_time * 1000:10.1f} ms")
+    print(f"Speedup:          {cell_time / layout_time:10.1f}x")
+    print(f"Identical output: {cell_text == layout_text}")
+
+
+if __name__ == "__main__":
+    main()
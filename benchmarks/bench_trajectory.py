@@ -0,0 +1,52 @@
+"""
+Parses an output file with many Mulliken steps, keeping only the last step or the whole trajectory,
+and reports the time, the peak memory and the memory retained by the trajectory.
+
+Usage: python benchmarks/bench_trajectory.py [N_ATOMS] [STEPS]
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+import tracemalloc
+
+from synthetic import write_output  # also puts src/ on sys.path
+
+from bootstrap import init_resources
+from output_parser import OutputParser
+
+
+def parse(filepath: Path, trajectory: bool) -> tuple[float, int, int, int]:
+    tracemalloc.start()
+    t0 = perf_counter()
+    parser = OutputParser(trajectory=trajectory)
+    parser.feed_file(filepath)
+    with redirect_stdout(StringIO()):
+        output = parser.build(columnar=True)
+    elapsed = perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    store = output.trajectory
+    retained = sum(len(values) * values.itemsize for values in (store.sums, store.diffs, store.sum_charges, store.diff_charges))
+    return elapsed, peak, retained, store.steps
+
+
+def main() -> None:
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    init_resources()
+
+    with TemporaryDirectory() as directory:
+        filepath = write_output(Path(directory) / "bench.out", n_atoms, steps=steps)
+        size_mb = filepath.stat().st_size / 1024**2
+        print(f"File: {n_atoms} atoms, {steps} steps, {size_mb:.1f} MB")
+        print(f"{'Kept steps':<12} {'Time (s)':>9} {'Peak (MB)':>10} {'Trajectory (MB)':>16}")
+        for name, trajectory in (("last", False), ("all", True)):
+            elapsed, peak, retained, kept = parse(filepath, trajectory)
+            print(f"{f'{name} ({kept})':<12} {elapsed:>9.2f} {peak / 1024**2:>10.1f} {retained / 1024**2:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Writer of synthetic CRYSTAL23 output files used by the benchmark scripts.
+
+The generated files reproduce the regions read by `OutputParser` (pseudopotentials, ghost atoms, basis set
+declaration and Mulliken population analysis) separated by a configurable amount of SCF noise.
+
+Usage: python benchmarks/synthetic.py OUTPUT_FILE N_ATOMS [NOISE_LINES] [options]
+"""
+from pathlib import Path
+from typing import Optional, Sequence
+import argparse
+import random
+import sys
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+# (symbol, atomic number, basis functions)
+ELEMENTS = [
+    ("O", 8, ["S", "SP", "SP", "D"]),
+    ("MG", 12, ["S", "SP", "SP", "SP", "D"]),
+]
+# element described by an Effective Core Potential (atomic number + 200)
+ECP_ELEMENT = ("AG", 47, ["SP", "SP", "SP", "D", "D"])
+ORBITALS_PER_FUNCTION = {"S": 1, "SP": 4, "P": 3, "D": 5, "F": 7, "G": 9}
+
+
+def _primitive_line(rng: random.Random) -> str:
+    values = [rng.uniform(0.1, 9.9) for _ in range(4)]
+    exponents = [rng.randint(-3, 4) for _ in range(4)]
+    return " " * 40 + " ".join(f"{v:.3f}E{e:+03d}" for v, e in zip(values, exponents))
+
+
+def _population_lines(label: int, symbol: str, atomic_number: int, values: list[float]) -> list[str]:
+    charge = sum(values)
+    lines = [f" {label:5d} {symbol:<3}{atomic_number:4d}{charge:8.3f}" + "".join(f"{v:7.3f}" for v in values[:8])]
+    for i in range(8, len(values), 8):
+        lines.append(" " * 20 + "".join(f"{v:7.3f}" for v in values[i:i + 8]))
+    return lines
+
+
+def write_output(path: Path,
+                 n_atoms: int,
+                 noise_lines: int = 0,
+                 open_shell: bool = True,
+                 ghosts: int = 0,
+                 ecp: bool = False,
+                 seed: int = 0,
+                 steps: int = 1,
+                 shells: Optional[Sequence[str]] = None) -> Path:
+    """
+    Writes an output file of `n_atoms` atoms, the last `ghosts` of them turned into ghosts, and returns its path.
+
+    `shells` (e.g. `["S", "SP", "P", "D", "F", "G"]`) replaces the basis set of every element. The `noise_lines`
+    SCF cycles are printed before the Mulliken population of each one of the `steps` optimization steps.
+    """
+    if shells is not None and (not shells or any(shell not in ORBITALS_PER_FUNCTION for shell in shells)):
+        raise ValueError(f"Invalid shells {shells}: expected a list of {", ".join(ORBITALS_PER_FUNCTION)}")
+    rng = random.Random(seed)
+    elements = ELEMENTS + [ECP_ELEMENT] if ecp else ELEMENTS
+    if shells is not None:
+        elements = [(symbol, atomic_number, list(shells)) for symbol, atomic_number, _ in elements]
+    atoms = [elements[i % len(elements)] for i in range(n_atoms)]
+    # the last atoms are turned into ghosts
+    ghost_labels = set(range(n_atoms - ghosts + 1, n_atoms + 1))
+
+    lines: list[str] = []
+    lines.append(" " * 20 + "CRYSTAL23 - SYNTHETIC OUTPUT")
+    if ecp:
+        lines.append(" *** PSEUDOPOTENTIAL INFORMATION ***")
+        lines.append(f" ATOMIC NUMBER {ECP_ELEMENT[1] + 200:3d}, NUCLEAR CHARGE  19.000, TYPE OF PSEUDOPOTENTIAL : HAYWSC")
+        lines.append("")
+    if ghost_labels:
+        lines.append(" ATOMS TRANSFORMED INTO GHOSTS")
+        ghost_tuples = [f"{label:4d}({atoms[label - 1][1]:3d})" for label in sorted(ghost_labels)]
+        for i in range(0, len(ghost_tuples), 10):
+            lines.append("".join(ghost_tuples[i:i + 10]))
+        lines.append("")
+    lines.append(" *" * 40)
+    lines.append(" LOCAL ATOMIC FUNCTIONS BASIS SET")
+    lines.append(" *" * 40)
+    lines.append("   ATOM   X(AU)   Y(AU)   Z(AU)  N. TYPE  EXPONENT  S COEF   P COEF   D/F/G COEF")
+    lines.append(" *" * 40)
+    declared: set[str] = set()
+    orbital = 0
+    for label, (symbol, _, functions) in enumerate(atoms, start=1):
+        x, y, z = (rng.uniform(-20, 20) for _ in range(3))
+        printed_symbol = "XX" if label in ghost_labels else symbol
+        lines.append(f" {label:5d} {printed_symbol:<3}{x:8.3f}{y:8.3f}{z:8.3f}")
+        if symbol in declared:
+            orbital += sum(ORBITALS_PER_FUNCTION[f] for f in functions)
+            continue
+        declared.add(symbol)
+        for function in functions:
+            size = ORBITALS_PER_FUNCTION[function]
+            first, last = orbital + 1, orbital + size
+            orbital = last
+            index = f"{first:4d}-{last:4d}" if size > 1 else f"{first:9d}"
+            lines.append(" " * 30 + f"{index} {function:<3}")
+            for _ in range(rng.randint(1, 3)):
+                lines.append(_primitive_line(rng))
+    lines.append(" *" * 40)
+    lines.append(" INFORMATION **** READM2 **** FULL DIRECT SCF (MONO AND BIEL INT) SELECTED")
+    lines.append("")
+
+    # Mulliken blocks are printed again at each step of an optimization, after its SCF cycles
+    blocks = ["ALPHA+BETA ELECTRONS", "ALPHA-BETA ELECTRONS"] if open_shell else ["ALPHA+BETA ELECTRONS"]
+    for step, block in enumerate(blocks * steps):
+        if step % len(blocks) == 0:
+            for cycle in range(noise_lines):
+                lines.append(f" CYC {cycle:4d} ETOT(AU) -2.752016E+02 DETOT -2.75E+02 tst  0.00E+00 PX  1.00E+00")
+        lines.append("")
+        lines.append(f" {block}")
+        lines.append(" MULLIKEN POPULATION ANALYSIS - NO. OF ELECTRONS   120.000000")
+        lines.append("")
+        lines.append("  ATOM                 Z CHARGE  A.O. POPULATION")
+        lines.append("")
+        for label, (symbol, atomic_number, functions) in enumerate(atoms, start=1):
+            size = sum(ORBITALS_PER_FUNCTION[f] for f in functions)
+            values = [rng.uniform(0, 2) for _ in range(size)]
+            if label in ghost_labels:
+                symbol, atomic_number = "XX", 0
+            lines += _population_lines(label, symbol, atomic_number, values)
+        lines.append("")
+        lines.append(" OVERLAP POPULATION CONDENSED TO ATOMS FOR FIRST NEIGHBORS (ELECTRONS)")
+
+    lines.append(" EEEEEEEEEE TERMINATION")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Writes a synthetic CRYSTAL23 output file.")
+    parser.add_argument("output_file", type=Path)
+    parser.add_argument("n_atoms", type=int)
+    parser.add_argument("noise_lines", type=int, nargs="?", default=0, help="SCF cycles before each Mulliken population")
+    parser.add_argument("--closed-shell", action="store_true", help="print the α+β population only")
+    parser.add_argument("--ghosts", type=int, default=0, help="number of atoms turned into ghosts")
+    parser.add_argument("--ecp", action="store_true", help="add an element described by a pseudopotential")
+    parser.add_argument("--steps", type=int, default=1, help="optimization steps printing the Mulliken population")
+    parser.add_argument("--shells", type=lambda value: value.upper().split(","),
+                        help="basis set of every element, e.g. S,SP,P,D,F,G")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_output(args.output_file, args.n_atoms, args.noise_lines, not args.closed_shell, args.ghosts, args.ecp,
+                 args.seed, args.steps, args.shells)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,16 @@ from pathlib import Path
 from typing import Optional
 from exceptions import ParsingException
 from dataclasses import dataclass
+from enum import Enum
+import glob
 import re
 import sys
 from time import perf_counter
 
 from logger import Logger
+from output_parser import OutputRegion, QueryPlan
 import regex_pattern
+import text_style
 
 
 @dataclass
@@ -37,6 +41,23 @@ class ParameterArgument(Argument):
     ...
 
 
+class ExportFormat(Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+    CSV = "csv"
+    NPZ = "npz"
+
+
+class MetricsFormat(Enum):
+    JSON = "json"
+
+
+def exports_to_stdout(args: list[str]) -> bool:
+    # checked before the arguments are parsed, so the banner is not mixed with exported records
+    exports = any(arg == "--format" or arg.startswith("--format=") for arg in args)
+    return exports and not any(arg == "--report" or arg.startswith("--report=") for arg in args)
+
+
 class ArgumentParser:
     valid_parameters = ["-a", "-b", "x"]
 
@@ -49,6 +70,14 @@ class ArgumentParser:
         if not path.is_file(): return False
         return True
 
+    @staticmethod
+    def expand_glob(arg: str, directory: Optional[Path] = None) -> list[str]:
+        # patterns quoted in the shell call, e.g. "scan_*/*.out"
+        if not glob.has_magic(arg):
+            return []
+        pattern = str(directory / arg) if directory else arg
+        return sorted(path for path in glob.glob(pattern, recursive=True) if ArgumentParser.is_file(path))
+
     @staticmethod
     def is_number(arg: str) -> bool:
         if not re.findall(regex_pattern.NUMBER_ARG_REGEX, arg):
@@ -68,9 +97,12 @@ class ArgumentParser:
         return True
 
     @staticmethod
-    def parse(arg: str) -> Optional[Argument]:
+    def parse(arg: str, directory: Optional[Path] = None) -> Optional[Argument]:
+        # relative paths are taken from `directory` when given, instead of the working directory
+        path = str(directory / arg) if directory else arg
+        if ArgumentParser.is_file(path):
+            return FileArgument(path)
         PARSER_MAP = {
-            ArgumentParser.is_file: FileArgument,
             ArgumentParser.is_number: NumberArgument,
             ArgumentParser.is_range: RangeArgument,
             ArgumentParser.is_parameter: ParameterArgument
@@ -79,21 +111,107 @@ class ArgumentParser:
             if check(arg): return cls(arg)
 
 
+def pop_switch(args: list[str], name: str) -> bool:
+    if name not in args:
+        return False
+    while name in args:
+        args.remove(name)
+    return True
+
+
+def pop_option(args: list[str], name: str) -> Optional[str]:
+    # accepts both "--name value" and "--name=value"
+    for i, arg in enumerate(args):
+        if arg == name:
+            if i + 1 >= len(args):
+                raise ParsingException(f"Option [bold]{name}[/] requires a value.")
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        if arg.startswith(f"{name}="):
+            del args[i]
+            return arg.split("=", 1)[1]
+    return None
+
+
 class ArgumentHandler:
-    def __init__(self, args: list[str]):
+    def __init__(self, args: list[str], cwd: Optional[Path] = None):
         t0 = perf_counter()
         self.args: list[Argument] = []
-        self._file: Optional[FileArgument] = None
+        self._files: list[FileArgument] = []
+        self.cwd = cwd  # directory of relative paths (the client's, in the daemon), by default the working directory
+
+        # ANSI styles in the log and in the tables
+        if pop_switch(args, "--no-color"):
+            text_style.color = False
 
         if "-debug" in args:
             args.remove("-debug")
             if not Logger.debugging:
                     Logger.debugging = True
                     Logger.info("Debug mode is now active")
+
+        # cProfile and tracemalloc reports of the parse, build and print stages
+        self.profile = pop_switch(args, "-profile")
+        self.memprofile = pop_switch(args, "-memprofile")
+
+        # options of the parsed output cache
+        self.use_cache = not pop_switch(args, "--no-cache")
+        cache_dir = pop_option(args, "--cache-dir")
+        self.cache_dir = self._path(cache_dir)
+
+        # structure-of-arrays representation of the parsed output
+        self.columnar = pop_switch(args, "--columnar")
+
+        # worker processes parsing the Mulliken population of an output file
+        jobs = pop_option(args, "--jobs")
+        try:
+            self.jobs = int(jobs) if jobs else 1
+            if self.jobs < 1:
+                raise ValueError
+        except ValueError:
+            raise ParsingException(f"Invalid number of jobs [bold italic]{jobs}[/]: must be a positive integer.")
+
+        # batch mode: aggregated report of all output files
+        report = pop_option(args, "--report")
+        self.report = self._path(report)
+
+        # follow an output file while it is written
+        self.follow = pop_switch(args, "--follow")
+        interval = pop_option(args, "--interval")
+        try:
+            self.interval = float(interval) if interval else None
+        except ValueError:
+            raise ParsingException(f"Invalid interval [bold italic]{interval}[/]: must be a number of seconds.")
+
+        # machine-readable export of the atomic orbitals instead of tables
+        self.trajectory = pop_switch(args, "--trajectory")  # Mulliken populations of every step
+        export_format = pop_option(args, "--format")
+        try:
+            self.export_format = ExportFormat(export_format.lower()) if export_format else None
+        except ValueError:
+            formats = ", ".join(f.value for f in ExportFormat)
+            raise ParsingException(f"Invalid export format [bold italic]{export_format}[/]. Available formats: {formats}.")
+
+        # machine-readable record of the time spent in each stage, written to stderr or to a file
+        metrics_format = pop_option(args, "--metrics")
+        metrics_file = pop_option(args, "--metrics-file")
+        try:
+            self.metrics_format = MetricsFormat(metrics_format.lower()) if metrics_format else None
+        except ValueError:
+            formats = ", ".join(f.value for f in MetricsFormat)
+            raise ParsingException(f"Invalid metrics format [bold italic]{metrics_format}[/]. Available formats: {formats}.")
+        self.metrics_file = self._path(metrics_file)
+        if self.metrics_file and not self.metrics_format:
+            self.metrics_format = MetricsFormat.JSON
         
         for arg in args:
             Logger.debug(f"Parsing argument: [purple]{arg}[/]")
-            parsed = ArgumentParser.parse(arg)
+            if matches := ArgumentParser.expand_glob(arg, cwd):
+                for match in matches:
+                    self._register_arg(FileArgument(match))
+                continue
+            parsed = ArgumentParser.parse(arg, cwd)
             
             if not parsed:
                 Logger.warn(f"Ignoring invalid argument: [bold italic]{arg}[/]")
@@ -104,11 +222,17 @@ class ArgumentHandler:
         delta_time = round((t1 - t0) * 1000, 1)
         Logger.debug(f"[dim]{f" Argument parsing done in {delta_time} ms ":~^80}[/]")
     
+    def _path(self, value: Optional[str]) -> Optional[Path]:
+        if not value:
+            return None
+        return self.cwd / value if self.cwd else Path(value)
+
     def _register_arg(self, arg: Argument) -> None:
         if isinstance(arg, FileArgument):
-            if self._file:
-                raise ParsingException("Only one file must be provided in the script call.")
-            self._file = arg
+            if arg in self._files:
+                Logger.warn(f"Ignoring duplicated file: [bold italic]{arg.value}[/]")
+            else:
+                self._files.append(arg)
         else:
             if arg in self.args:
                 Logger.warn(f"Ignoring duplicated argument: [bold italic]{arg.value}[/]")
@@ -117,10 +241,10 @@ class ArgumentHandler:
         
         Logger.debug(f"> [purple]{repr(arg)}[/]")
     
-    def get_output_file(self) -> Path:
-        if not self._file:
+    def get_output_files(self) -> list[Path]:
+        if not self._files:
             raise ParsingException(f"A [bold]CRYSTAL output file[/] must be provided.")
-        return Path(self._file.value)
+        return [Path(file.value) for file in self._files]
     
     @property
     def parameters(self) -> list[ParameterArgument]:
@@ -134,6 +258,33 @@ class ArgumentHandler:
     def ranges(self) -> list[RangeArgument]:
         return [arg for arg in self.args if isinstance(arg, RangeArgument)]
 
+    @property
+    def required_regions(self) -> set[OutputRegion]:
+        # atoms and basis sets are always summarized
+        regions = {OutputRegion.PseudoRegion, OutputRegion.GhostRegion, OutputRegion.BasisSetRegion}
+        # enumerations and exports include the Mulliken population of each atomic orbital
+        enumerates = self.numbers or self.ranges or any(arg.value == "x" for arg in self.parameters)
+        if enumerates or self.export_format:
+            regions |= {OutputRegion.MullikenSumValues, OutputRegion.MullikenDiffValues}
+        return regions
+
+    @property
+    def lazy_populations(self) -> bool:
+        # exports and trajectories use the populations of every atom as arrays, --jobs parses them in parallel
+        return not self.export_format and not self.trajectory and self.jobs == 1
+
+    @property
+    def query_plan(self) -> QueryPlan:
+        regions = frozenset(self.required_regions)
+        # the atoms table and the exports use every atom
+        if self.export_format or any(arg.value == "-a" for arg in self.parameters):
+            return QueryPlan(regions)
+        labels = {int(arg.value) for arg in self.numbers}
+        for arg in self.ranges:
+            first, last = sorted(int(limit) for limit in arg.value.split("-"))
+            labels.update(range(first, last + 1))
+        return QueryPlan(regions, frozenset(labels), any(arg.value == "x" for arg in self.parameters))
+
 
 def parse_arguments() -> ArgumentHandler:
     if not len(sys.argv) > 1:
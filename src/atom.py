@@ -12,8 +12,8 @@ class Atom:
     label: int
     element: Element
     basis_set: Optional[BasisSet]
-    x: Decimal
-    y: Decimal
-    z: Decimal
+    x: Optional[Decimal]  # None for the atoms out of the query plan
+    y: Optional[Decimal]
+    z: Optional[Decimal]
     is_ghost: bool
     mulliken: Optional[MullikenPopulation] = None
@@ -0,0 +1,85 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+import os
+
+from arguments import ArgumentHandler
+from bootstrap import init_resources
+from columnar_output import ColumnarOutput
+from crystal_output import CrystalOutput
+from exceptions import ApplicationException, format_traceback
+from logger import Logger
+from metrics import FileMetrics, Metrics
+from output_loader import load_output
+from periodic_table import PeriodicTable
+import text_style
+
+
+FILES_AHEAD = 2  # files parsed by each worker ahead of the result being printed
+
+
+@dataclass
+class BatchResult:
+    output_file: Path
+    output: Optional[CrystalOutput | ColumnarOutput]
+    log: str  # messages logged while loading the output file
+    error: Optional[str] = None
+    metrics: Optional[FileMetrics] = None  # with --metrics
+
+
+def _load_in_worker(output_file: Path, arguments: ArgumentHandler, debugging: bool, color: bool) -> BatchResult:
+    # workers started with "spawn" do not inherit the resources nor the logger state
+    if not PeriodicTable.elements:
+        init_resources()
+    Logger.debugging = debugging
+    text_style.color = color
+    Metrics.enabled = arguments.metrics_format is not None
+    Metrics.files = []
+
+    # capture the log so it is printed in order with the results of each file
+    log = StringIO()
+    with redirect_stdout(log):
+        try:
+            output = load_output(output_file, arguments)
+        except ApplicationException as error:
+            return BatchResult(output_file, None, log.getvalue(), str(error), _worker_metrics())
+        except Exception as error:
+            return BatchResult(output_file, None, log.getvalue(), format_traceback(error), _worker_metrics())
+    return BatchResult(output_file, output, log.getvalue(), metrics=_worker_metrics())
+
+
+def _worker_metrics() -> Optional[FileMetrics]:
+    # metrics of the file loaded by the worker, sent back with its result
+    return Metrics.files[-1] if Metrics.files else None
+
+
+def worker_count(n_files: int) -> int:
+    cpus = os.process_cpu_count() or 1
+    return max(1, min(n_files, cpus))
+
+
+def load_outputs(output_files: list[Path], arguments: ArgumentHandler) -> Iterator[BatchResult]:
+    """
+    Parses the output files in a pool of worker processes, yielding the results in the order of `output_files`.
+
+    At most `FILES_AHEAD` files per worker are parsed ahead of the result being handled, so the output objects held
+    at once do not grow with the number of files.
+    """
+    workers = worker_count(len(output_files))
+    Logger.debug(f"Parsing [purple]{len(output_files)}[/] output files with [purple]{workers}[/] worker processes")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit(output_file: Path) -> Future:
+            return executor.submit(_load_in_worker, output_file, arguments, Logger.debugging, text_style.color_enabled())
+
+        remaining = iter(output_files)
+        pending = deque(submit(output_file) for output_file in islice(remaining, workers * FILES_AHEAD))
+        while pending:
+            result = pending.popleft().result()
+            if (output_file := next(remaining, None)) is not None:
+                pending.append(submit(output_file))
+            yield result
@@ -1,5 +1,6 @@
 from pathlib import Path
-import yaml
+from typing import Optional
+import marshal
 
 from element import Element
 from exceptions import ApplicationException
@@ -8,26 +9,61 @@ from periodic_table import PeriodicTable
 
 
 BASE_DIR = Path(__file__).parent
+RESOURCE_FILES = ("periodic_table.yaml", "orbitals.yaml")
+# resources compiled from the YAML files, reused while the YAML files are unchanged
+COMPILED_RESOURCES = BASE_DIR / "__pycache__" / "resources.marshal"
 
 def load_yaml(filepath: Path) -> dict:
+    import yaml  # only needed when the compiled resources are missing or outdated
+
     with open(filepath, "r", encoding="utf-8") as file:
         dict = yaml.safe_load(file)
     return dict
 
-def load_periodic_table() -> bool:
-    elements = load_yaml(BASE_DIR / "periodic_table.yaml")
+def _resource_stamps() -> dict[str, tuple[int, int]]:
+    stamps = {}
+    for name in RESOURCE_FILES:
+        stat = (BASE_DIR / name).stat()
+        stamps[name] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+def load_compiled_resources() -> Optional[dict]:
+    try:
+        with open(COMPILED_RESOURCES, "rb") as file:
+            resources = marshal.load(file)
+        if resources["stamps"] != _resource_stamps():
+            return None
+        return resources
+    except Exception:
+        return None
+
+def compile_resources() -> dict:
+    resources = {
+        "stamps": _resource_stamps(),
+        "elements": load_yaml(BASE_DIR / "periodic_table.yaml"),
+        "orbitals": load_yaml(BASE_DIR / "orbitals.yaml"),
+    }
+    try:
+        COMPILED_RESOURCES.parent.mkdir(exist_ok=True)
+        with open(COMPILED_RESOURCES, "wb") as file:
+            marshal.dump(resources, file)
+    except OSError:  # read-only installation: compile again on the next call
+        pass
+    return resources
+
+def load_periodic_table(elements: list[dict]) -> bool:
+    PeriodicTable.clear()
     for element in elements:
         e = Element(element["atomic_number"],
                     element["name"],
                     element["symbol"])
-        PeriodicTable.elements.append(e)
+        PeriodicTable.add_element(e)
     if len(PeriodicTable.elements) != 119:
         return False
     return True
 
-def load_orbitals() -> bool:
+def load_orbitals(orbitals: dict) -> bool:
     try:
-        orbitals = load_yaml(BASE_DIR / "orbitals.yaml")
         AtomicOrbitals.S = [f"s [{orb}]" for orb in orbitals["s"]] 
         AtomicOrbitals.SP = [f"sp [{orb}]" for orb in orbitals["sp"]] 
         AtomicOrbitals.P = [f"p [{orb}]" for orb in orbitals["p"]] 
@@ -50,7 +86,13 @@ def load_orbitals() -> bool:
     return True
 
 def init_resources():
-    if not load_periodic_table():
+    resources = load_compiled_resources()
+    if resources is None:
+        try:
+            resources = compile_resources()
+        except Exception as exc:
+            raise ApplicationException(f"Failed to load resource files: {exc}")
+    if not load_periodic_table(resources["elements"]):
         raise ApplicationException("Failed to load Periodic Table.")
-    if not load_orbitals():
-        raise ApplicationException("Failed to load Atomic Orbitals.")
\ No newline at end of file
+    if not load_orbitals(resources["orbitals"]):
+        raise ApplicationException("Failed to load Atomic Orbitals.")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Thin client of the query daemon started with `main.py --daemon`.
+
+Sends the arguments of the script call to the daemon and prints its answer. Only standard library modules
+are imported, so a query costs a socket round trip instead of a full start of the script.
+"""
+from pathlib import Path
+import json
+import os
+import socket
+import sys
+
+
+def default_socket_path() -> Path:
+    if path := os.environ.get("BSCOUNT_SOCKET"):
+        return Path(path)
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(runtime_dir) / "bscount.sock"
+    return Path(f"/tmp/bscount-{os.getuid()}.sock")
+
+
+def pop_socket(args: list[str]) -> Path:
+    # same syntax as arguments.pop_option
+    for i, arg in enumerate(args):
+        if arg == "--socket" and i + 1 < len(args):
+            del args[i]
+            return Path(args.pop(i))
+        if arg.startswith("--socket="):
+            return Path(args.pop(i).split("=", 1)[1])
+    return default_socket_path()
+
+
+def query(socket_path: Path, args: list[str], color: bool) -> bytes:
+    request = {"cwd": os.getcwd(), "args": args, "color": color}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(socket_path))
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        chunks = []
+        while chunk := connection.recv(65536):
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    socket_path = pop_socket(args)
+    color = sys.stdout.isatty() and "--no-color" not in args
+    try:
+        answer = query(socket_path, args, color)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"[ ERROR ] No daemon listening on {socket_path}. Start it with: python main.py --daemon", file=sys.stderr)
+        return 1
+    sys.stdout.buffer.write(answer)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+from array import array
+from collections.abc import Sequence
+from decimal import Decimal
+from itertools import repeat
+from math import isnan, nan
+from operator import add, mul, sub
+from typing import Optional, overload
+
+from atom import Atom
+from basis_set import BasisSet
+from periodic_table import PeriodicTable
+from population_analysis import AlphaBetaPair, MullikenPopulation
+
+
+def _coordinate(value: float) -> Optional[Decimal]:
+    # NaN for the atoms parsed without coordinates (out of the query plan)
+    return None if isnan(value) else Decimal(repr(value))
+
+
+def _decimal(value: float, digits: int) -> Decimal:
+    # values in the output file have a fixed number of decimal digits: rounding recovers their exact text
+    return Decimal(repr(round(value, digits)))
+
+
+class MullikenColumns:
+    """
+    Mulliken population of all atoms as flat arrays.
+
+    The populations of atom `i` are `alpha[offsets[i]:offsets[i + 1]]` and `beta[offsets[i]:offsets[i + 1]]`.
+    """
+    def __init__(self, offsets: array, sum_charges: array, diff_charges: array, alpha: array, beta: array) -> None:
+        self.offsets = offsets
+        self.sum_charges = sum_charges  # α+β charge of each atom
+        self.diff_charges = diff_charges  # α-β charge of each atom
+        self.alpha = alpha
+        self.beta = beta
+
+    def population(self, index: int) -> MullikenPopulation:
+        return MullikenPopulation(_decimal(self.sum_charges[index], 3),
+                                  _decimal(self.diff_charges[index], 3),
+                                  OrbitalPopulationView(self, self.offsets[index], self.offsets[index + 1]))
+
+
+class MullikenTrajectory:
+    """
+    Mulliken populations of every step of an output file (e.g. each geometry of an optimization).
+
+    A step is one α+β block, followed by its α-β block in open-shell systems. The populations of all steps are
+    stored as `(steps × orbitals)` double arrays, row by row; only the last `keep_steps` steps are kept.
+    """
+    def __init__(self, keep_steps: Optional[int] = None) -> None:
+        self.keep_steps = keep_steps  # None keeps every step
+        self.offsets: Optional[array] = None  # 'q', same layout for every step
+        self.restricted_shell: Optional[bool] = None
+        self.first_step = 1  # number of the first step kept, counted from 1
+        self.steps = 0  # number of steps kept
+        self.sum_charges, self.sums = array("d"), array("d")  # α+β
+        self.diff_charges, self.diffs = array("d"), array("d")  # α-β, empty in closed-shell systems
+
+    @property
+    def last_step(self) -> int:
+        return self.first_step + self.steps - 1
+
+    def accepts(self, offsets: array, restricted_shell: bool) -> bool:
+        # every step must have the same atoms, atomic orbitals and type of shell
+        return self.offsets is None or (offsets == self.offsets and restricted_shell == self.restricted_shell)
+
+    def append(self, offsets: array, sum_charges: array, sums: array, diff_charges: array, diffs: array) -> None:
+        if self.offsets is None:
+            self.offsets = offsets
+            self.restricted_shell = not diffs
+        self.sum_charges.extend(sum_charges)
+        self.sums.extend(sums)
+        self.diff_charges.extend(diff_charges)
+        self.diffs.extend(diffs)
+        self.steps += 1
+        if self.keep_steps is not None and self.steps > self.keep_steps:
+            self._drop_first_step()
+
+    def copy(self) -> "MullikenTrajectory":
+        trajectory = MullikenTrajectory(self.keep_steps)
+        trajectory.offsets = self.offsets
+        trajectory.restricted_shell = self.restricted_shell
+        trajectory.first_step = self.first_step
+        trajectory.steps = self.steps
+        trajectory.sum_charges, trajectory.sums = array("d", self.sum_charges), array("d", self.sums)
+        trajectory.diff_charges, trajectory.diffs = array("d", self.diff_charges), array("d", self.diffs)
+        return trajectory
+
+    def _drop_first_step(self) -> None:
+        n_atoms, n_orbitals = len(self.offsets) - 1, self.offsets[-1]
+        del self.sum_charges[:n_atoms]
+        del self.sums[:n_orbitals]
+        if not self.restricted_shell:
+            del self.diff_charges[:n_atoms]
+            del self.diffs[:n_orbitals]
+        self.first_step += 1
+        self.steps -= 1
+
+    def step(self, number: Optional[int] = None) -> MullikenColumns:
+        """
+        Populations of a step (by default, the last one), with α and β computed from the stored rows.
+        """
+        number = self.last_step if number is None else number
+        if not self.first_step <= number <= self.last_step:
+            raise IndexError(f"step {number} is not stored")
+        n_atoms, n_orbitals = len(self.offsets) - 1, self.offsets[-1]
+        row = number - self.first_step
+        sum_charges = self.sum_charges[row * n_atoms:(row + 1) * n_atoms]
+        sums = self.sums[row * n_orbitals:(row + 1) * n_orbitals]
+        if self.restricted_shell:
+            # α = β = (α+β) / 2, without materializing the zero α-β population
+            alpha = array("d", map(mul, sums, repeat(0.5)))
+            return MullikenColumns(self.offsets, sum_charges, array("d", bytes(8 * n_atoms)), alpha, alpha)
+        diff_charges = self.diff_charges[row * n_atoms:(row + 1) * n_atoms]
+        diffs = self.diffs[row * n_orbitals:(row + 1) * n_orbitals]
+        alpha = array("d", map(mul, map(add, sums, diffs), repeat(0.5)))
+        beta = array("d", map(sub, sums, alpha))
+        return MullikenColumns(self.offsets, sum_charges, diff_charges, alpha, beta)
+
+
+class OrbitalPopulationView(Sequence):
+    """
+    Read-only list of `AlphaBetaPair` objects created on access from `MullikenColumns`.
+    """
+    def __init__(self, columns: MullikenColumns, start: int, stop: int) -> None:
+        self._columns = columns
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> AlphaBetaPair: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[AlphaBetaPair]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("orbital index out of range")
+        position = self._start + index
+        return AlphaBetaPair(_decimal(self._columns.alpha[position], 4), _decimal(self._columns.beta[position], 4))
+
+
+class AtomView(Sequence):
+    """
+    Read-only list of `Atom` objects created on access from a `ColumnarOutput`.
+    """
+    def __init__(self, output: "ColumnarOutput") -> None:
+        self._output = output
+
+    def __len__(self) -> int:
+        return len(self._output.labels)
+
+    @overload
+    def __getitem__(self, index: int) -> Atom: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[Atom]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("atom index out of range")
+        return self._output.atom(index)
+
+
+class ColumnarOutput:
+    """
+    Structure-of-arrays representation of a `CrystalOutput`.
+
+    Atoms are stored as typed arrays (label, atomic number, ghost flag, basis set index and coordinates) and
+    `atoms` is a lazy view creating `Atom` objects on access, so `Printer` works with both representations.
+    """
+    def __init__(self,
+                 basis_sets: list[BasisSet],
+                 labels: array,
+                 atomic_numbers: array,
+                 ghosts: array,
+                 basis_set_indices: array,
+                 coordinates: array,
+                 mulliken: Optional[MullikenColumns] = None,
+                 restricted_shell: Optional[bool] = None,
+                 trajectory: Optional[MullikenTrajectory] = None) -> None:
+        self.basis_sets = basis_sets
+        self.labels = labels  # 'q'
+        self.atomic_numbers = atomic_numbers  # 'h'
+        self.ghosts = ghosts  # 'b'
+        self.basis_set_indices = basis_set_indices  # 'h', -1 for atoms without basis set
+        self.coordinates = coordinates  # 'd', x, y, z of each atom
+        self.mulliken = mulliken
+        self.restricted_shell = restricted_shell
+        self.trajectory = trajectory  # Mulliken populations of every step, `mulliken` is the last one
+        self.atoms = AtomView(self)
+        self.build_index()
+
+    @property
+    def ghost_count(self) -> int:
+        return sum(self.ghosts)
+
+    def build_index(self) -> None:
+        # same lookup tables as CrystalOutput
+        self.label_index: dict[int, int] = {}
+        for i, label in enumerate(self.labels):
+            self.label_index.setdefault(label, i)
+        orbital_counts = [sum(function.function_type.value for function in basis_set.basis_functions)
+                          for basis_set in self.basis_sets]
+        self.orbital_offsets = array("q", [0])
+        total = 0
+        for basis_set_index in self.basis_set_indices:
+            total += orbital_counts[basis_set_index] if basis_set_index >= 0 else 0
+            self.orbital_offsets.append(total)
+
+    def atom(self, index: int) -> Atom:
+        basis_set_index = self.basis_set_indices[index]
+        x, y, z = self.coordinates[3 * index:3 * index + 3]
+        return Atom(self.labels[index],
+                    PeriodicTable.get_element(self.atomic_numbers[index]),
+                    self.basis_sets[basis_set_index] if basis_set_index >= 0 else None,
+                    _coordinate(x),
+                    _coordinate(y),
+                    _coordinate(z),
+                    bool(self.ghosts[index]),
+                    self.mulliken.population(index) if self.mulliken else None)
+
+    @classmethod
+    def from_atoms(cls,
+                   atoms: list[Atom],
+                   basis_sets: list[BasisSet],
+                   mulliken: Optional[MullikenColumns] = None,
+                   restricted_shell: Optional[bool] = None,
+                   trajectory: Optional[MullikenTrajectory] = None) -> "ColumnarOutput":
+        positions = {id(basis_set): i for i, basis_set in enumerate(basis_sets)}
+        coordinates = array("d")
+        for atom in atoms:
+            if atom.x is None:
+                coordinates.extend((nan, nan, nan))
+            else:
+                coordinates.extend((float(atom.x), float(atom.y), float(atom.z)))
+        return cls(basis_sets,
+                   array("q", (atom.label for atom in atoms)),
+                   array("h", (atom.element.atomic_number for atom in atoms)),
+                   array("b", (atom.is_ghost for atom in atoms)),
+                   array("h", (positions[id(atom.basis_set)] if atom.basis_set is not None else -1 for atom in atoms)),
+                   coordinates,
+                   mulliken,
+                   restricted_shell,
+                   trajectory)
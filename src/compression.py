@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+import bz2
+import gzip
+import lzma
+
+
+# magic bytes at the start of compressed output files
+MAGIC_NUMBERS: dict[bytes, tuple[str, Callable[[Path], BinaryIO]]] = {
+    b"\x1f\x8b": ("gzip", gzip.open),
+    b"\xfd7zXZ\x00": ("xz", lzma.open),
+    b"BZh": ("bzip2", bz2.open),
+}
+MAGIC_SIZE = max(len(magic) for magic in MAGIC_NUMBERS)
+
+
+def _match_magic(filepath: Path) -> Optional[tuple[str, Callable[[Path], BinaryIO]]]:
+    with open(filepath, "rb") as file:
+        head = file.read(MAGIC_SIZE)
+    for magic, compression in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def detect_compression(filepath: Path) -> Optional[str]:
+    # compression format from the magic bytes of the file, whatever its extension
+    compression = _match_magic(filepath)
+    return compression[0] if compression else None
+
+
+def open_decompressed(filepath: Path) -> Optional[BinaryIO]:
+    """
+    Binary stream of the decompressed content of a compressed output file, or `None` if the file is not compressed.
+
+    The content is inflated while it is read: closing the stream early leaves the rest of the archive untouched.
+    """
+    compression = _match_magic(filepath)
+    return compression[1](filepath) if compression else None
@@ -1,10 +1,37 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 from atom import Atom
 from basis_set import BasisSet
+from columnar_output import MullikenTrajectory
 
 
 @dataclass
 class CrystalOutput:
     atoms: list[Atom]
     basis_sets: list[BasisSet]
+    restricted_shell: Optional[bool] = None  # None when the Mulliken Population was not parsed
+    trajectory: Optional[MullikenTrajectory] = None  # Mulliken populations of every step, atoms hold the last one
+
+    # lookup tables built once from the atoms
+    label_index: dict[int, int] = field(init=False, repr=False, compare=False)
+    orbital_offsets: list[int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.build_index()
+
+    @property
+    def ghost_count(self) -> int:
+        return sum(1 for atom in self.atoms if atom.is_ghost)
+
+    def build_index(self) -> None:
+        # label -> position in self.atoms (first occurrence)
+        self.label_index = {}
+        # orbital_offsets[i] is the number of atomic orbitals before atom i (prefix sum)
+        self.orbital_offsets = [0]
+        for i, atom in enumerate(self.atoms):
+            self.label_index.setdefault(atom.label, i)
+            count = 0
+            if atom.basis_set is not None:
+                count = sum(function.function_type.value for function in atom.basis_set.basis_functions)
+            self.orbital_offsets.append(self.orbital_offsets[-1] + count)
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+import asyncio
+import json
+import os
+import signal
+import socket
+
+from arguments import ArgumentHandler, pop_option
+from client import default_socket_path
+from columnar_output import ColumnarOutput
+from crystal_output import CrystalOutput
+from exceptions import ApplicationException, DaemonException, format_traceback
+from logger import Logger
+from output_loader import load_output
+from output_parser import OutputParser, OutputRegion, QueryPlan
+from printer import Printer
+import text_style
+
+
+DEFAULT_MEMORY_MB = 1024
+MAX_REQUEST_SIZE = 1024 * 1024
+# bytes retained per atom (object and columnar backends) and per atomic orbital, measured as in bench_memory.py
+OBJECT_ATOM_BYTES = 1200
+COLUMNAR_ATOM_BYTES = 200
+ORBITAL_BYTES = 34
+
+
+@dataclass
+class StoredOutput:
+    size: int  # bytes of the output file
+    mtime_ns: int
+    columnar: bool
+    output: CrystalOutput | ColumnarOutput
+    memory: int  # estimated bytes used by the output object
+
+
+class OutputStore:
+    """
+    Output objects kept in memory by the daemon, evicted in LRU order when their estimated size exceeds `max_memory`.
+
+    Output files are always parsed in full, so one entry answers every request on the same file.
+    """
+    def __init__(self, max_memory: int) -> None:
+        self.max_memory = max_memory
+        self.memory = 0
+        self.entries: OrderedDict[Path, StoredOutput] = OrderedDict()
+
+    def get(self, output_file: Path, arguments: ArgumentHandler) -> CrystalOutput | ColumnarOutput:
+        key = output_file.resolve()
+        stat = key.stat()
+        entry = self.entries.get(key)
+        if entry and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns and entry.columnar == arguments.columnar:
+            self.entries.move_to_end(key)
+            Logger.debug("Output object found in memory")
+            OutputParser.log_summary(entry.output)
+            return entry.output
+
+        if entry:
+            Logger.debug("Output object in memory is stale: [bold]reloading[/]")
+            self._remove(key)
+        # every region, atom and population, for the next queries
+        output = load_output(output_file, arguments, QueryPlan(frozenset(OutputRegion)), lazy=False)
+        entry = StoredOutput(stat.st_size, stat.st_mtime_ns, arguments.columnar, output,
+                             self.estimate_memory(output, arguments.columnar))
+        self.entries[key] = entry
+        self.memory += entry.memory
+        self._evict()
+        return output
+
+    @staticmethod
+    def estimate_memory(output: CrystalOutput | ColumnarOutput, columnar: bool) -> int:
+        # from the number of atoms and atomic orbitals, without walking the object
+        atom_bytes = COLUMNAR_ATOM_BYTES if columnar else OBJECT_ATOM_BYTES
+        return len(output.atoms) * atom_bytes + output.orbital_offsets[-1] * ORBITAL_BYTES
+
+    def _remove(self, key: Path) -> None:
+        self.memory -= self.entries.pop(key).memory
+
+    def _evict(self) -> None:
+        # the most recently used entry is kept even if it exceeds the limit alone
+        while self.memory > self.max_memory and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            Logger.debug(f"Evicting [purple]{key.name}[/] from memory")
+            self._remove(key)
+
+
+class QueryDaemon:
+    """
+    Answers the queries sent by `client.py` over a Unix socket, with the same arguments as the script call.
+
+    A request is a JSON line `{"cwd": ..., "args": [...], "color": ...}`; the answer is the text the script
+    would print, followed by the end of the connection. Requests are answered one at a time, in a worker thread
+    that leaves the event loop free to accept the next connections.
+    """
+    def __init__(self, socket_path: Path, store: OutputStore) -> None:
+        self.socket_path = socket_path
+        self.store = store
+        # one thread: answers redirect stdout and change the logger and color settings
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def answer(self, request: dict) -> str:
+        log = StringIO()
+        # relative paths and glob patterns are resolved from the directory of the client
+        cwd, args = Path(request["cwd"]), list(request["args"])
+        # debug messages of the daemon are not sent to clients, unless requested with -debug
+        debugging = Logger.debugging
+        Logger.debugging = False
+        with redirect_stdout(log), text_style.colors(bool(request.get("color"))):
+            try:
+                arguments = ArgumentHandler(args, cwd)
+                if arguments.export_format or arguments.report:
+                    Logger.warn("Ignoring [bold]--format[/] and [bold]--report[/]: not available through the daemon")
+                output_files = arguments.get_output_files()
+                styled = text_style.color_enabled()
+                for output_file in output_files:
+                    if len(output_files) > 1:
+                        Logger.request(f"Output file: [bold purple]{output_file}[/]")
+                    output_obj = self.store.get(output_file, arguments)
+                    Printer(output_obj).write_requests(arguments.args, log, styled)
+            except ApplicationException as error:
+                Logger.error(str(error))
+            except Exception as error:
+                Logger.error(format_traceback(error))
+            finally:
+                Logger.debugging = debugging
+        return log.getvalue()
+
+    def respond(self, line: bytes) -> bytes:
+        # runs in the worker thread: the log of the daemon is not written while an answer redirects stdout
+        try:
+            t0 = perf_counter()
+            request = json.loads(line)
+            answer = self.answer(request).encode("utf-8")
+            t1 = perf_counter()
+            delta_time = round((t1 - t0) * 1000, 1)
+            Logger.debug(f"Answered [purple]{" ".join(request["args"])}[/] in {delta_time} ms")
+            return answer
+        except (ValueError, KeyError, TypeError) as error:
+            Logger.warn(f"Ignoring invalid request: {error}")
+            return b""
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            line = await reader.readline()
+            writer.write(await loop.run_in_executor(self.executor, self.respond, line))
+            await writer.drain()
+        except (ValueError, OSError) as error:
+            # request over MAX_REQUEST_SIZE or client gone before the answer
+            await loop.run_in_executor(self.executor, Logger.warn, f"Ignoring request: {error}")
+        finally:
+            writer.close()
+
+    def _check_socket(self) -> None:
+        if not self.socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # left behind by a daemon that did not stop cleanly
+                self.socket_path.unlink(missing_ok=True)
+                return
+        raise DaemonException(f"A daemon is already listening on [purple]{self.socket_path}[/].")
+
+    async def serve(self) -> None:
+        self._check_socket()
+        # the socket is created without permissions for other users
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self._handle, str(self.socket_path), limit=MAX_REQUEST_SIZE)
+        finally:
+            os.umask(umask)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        Logger.info(f"Daemon listening on [purple]{self.socket_path}[/] (stop with Ctrl+C)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.socket_path.unlink(missing_ok=True)
+
+
+def run_daemon(args: list[str]) -> None:
+    socket_path = pop_option(args, "--socket")
+    memory = pop_option(args, "--memory")
+    try:
+        max_memory = int(memory if memory else DEFAULT_MEMORY_MB) * 1024 * 1024
+    except ValueError:
+        raise DaemonException(f"Invalid memory limit [bold italic]{memory}[/]: must be a number of MB.")
+    if "-debug" in args:
+        Logger.debugging = True
+
+    daemon = QueryDaemon(Path(socket_path) if socket_path else default_socket_path(), OutputStore(max_memory))
+    try:
+        asyncio.run(daemon.serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        Logger.info("Daemon stopped")
@@ -10,6 +10,8 @@ class GhostException(ApplicationException): ...
 class PeriodicTableException(ApplicationException): ...
 class CellException(ApplicationException): ...
 class TableException(ApplicationException): ...
+class ExportException(ApplicationException): ...
+class DaemonException(ApplicationException): ...
 
 
 def format_traceback(exception: BaseException) -> str:
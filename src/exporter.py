@@ -0,0 +1,220 @@
+from abc import ABC, abstractmethod
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+import csv
+import json
+
+from arguments import ArgumentHandler, ExportFormat, NumberArgument, RangeArgument
+from columnar_output import ColumnarOutput, MullikenColumns
+from crystal_output import CrystalOutput
+from exceptions import ExportException
+from logger import Logger
+from orbitals import AtomicOrbitals
+
+
+# fields of an atomic orbital record, in order
+RECORD_FIELDS = ("output", "label", "element", "ghost", "shell", "orbital", "index", "step", "alpha", "beta")
+
+type OrbitalRecord = tuple[str, int, str, bool, str, str, int, Optional[int], Optional[float], Optional[float]]
+
+
+def select_atoms(output: CrystalOutput | ColumnarOutput, arguments: ArgumentHandler) -> list[int]:
+    """
+    Indices of the atoms requested by the enumeration arguments, in the order of the script call.
+
+    Every atom is exported when there are no enumeration arguments.
+    """
+    indices: list[int] = []
+    for arg in arguments.args:
+        if isinstance(arg, NumberArgument):
+            labels = [int(arg.value)]
+        elif isinstance(arg, RangeArgument):
+            x, y = (int(limit) for limit in arg.value.split("-"))
+            labels = range(x, y + 1) if x <= y else range(x, y - 1, -1)
+        elif arg.value == "x":
+            indices.extend(i for i, atom in enumerate(output.atoms) if atom.is_ghost)
+            continue
+        else:
+            continue
+        indices.extend(index for label in labels if (index := output.label_index.get(label)) is not None)
+
+    if not (arguments.numbers or arguments.ranges or any(arg.value == "x" for arg in arguments.parameters)):
+        return list(range(len(output.atoms)))
+    # an atom requested twice is exported once
+    return list(dict.fromkeys(indices))
+
+
+def _populations(mulliken: Optional[MullikenColumns], index: int) -> Optional[Iterator[tuple[float, float]]]:
+    # α and β populations of each atomic orbital of an atom as floats, read from the arrays of a step
+    if mulliken is None:
+        return None
+    start, stop = mulliken.offsets[index], mulliken.offsets[index + 1]
+    return zip(mulliken.alpha[start:stop], mulliken.beta[start:stop])
+
+
+def iter_orbital_records(output: CrystalOutput | ColumnarOutput,
+                         output_file: Path,
+                         indices: list[int],
+                         trajectory: bool = False) -> Iterator[OrbitalRecord]:
+    """
+    Yields one record per atomic orbital of the atoms at `indices`, without creating any table.
+
+    The populations are those of the last step, or of every step (step by step) with `trajectory`.
+    """
+    if output.trajectory is None:
+        steps = [(None, None)]
+    elif trajectory:
+        steps = ((number, output.trajectory.step(number))
+                 for number in range(output.trajectory.first_step, output.trajectory.last_step + 1))
+    else:
+        steps = [(output.trajectory.last_step, output.trajectory.step())]
+
+    output_name = str(output_file)
+    for step, mulliken in steps:
+        for i in indices:
+            atom = output.atoms[i]
+            if atom.basis_set is None:
+                continue
+            populations = _populations(mulliken, i)
+            index = output.orbital_offsets[i]
+            for basis_function in atom.basis_set.basis_functions:
+                shell = basis_function.function_type.name
+                for orbital in getattr(AtomicOrbitals, shell):
+                    index += 1
+                    if populations is None:
+                        yield output_name, atom.label, atom.element.symbol, atom.is_ghost, shell, orbital, index, None, None, None
+                        continue
+                    alpha, beta = next(populations)
+                    yield (output_name, atom.label, atom.element.symbol, atom.is_ghost, shell, orbital, index, step,
+                           round(alpha, 4), round(beta, 4))
+
+
+class RecordWriter(ABC):
+    """
+    Writes atomic orbital records to a stream, between one `begin` and one `end` call.
+    """
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.count = 0
+
+    def begin(self) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, records: Iterable[OrbitalRecord]) -> None:
+        ...
+
+    def end(self) -> None:
+        Logger.debug(f"Exported [purple]{self.count}[/] atomic orbitals")
+
+
+class JsonLinesWriter(RecordWriter):
+    # one JSON object per line
+    TEMPLATE = ('{{"output": {}, "label": {}, "element": {}, "ghost": {}, "shell": {}, '
+                '"orbital": {}, "index": {}, "step": {}, "alpha": {}, "beta": {}}}')
+
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__(stream)
+        self._strings: dict[str, str] = {}  # JSON encoding of the repeated strings
+
+    def _string(self, value: str) -> str:
+        if value not in self._strings:
+            self._strings[value] = json.dumps(value)
+        return self._strings[value]
+
+    def _encode(self, record: OrbitalRecord) -> str:
+        output, label, element, ghost, shell, orbital, index, step, alpha, beta = record
+        return self.TEMPLATE.format(self._string(output), label, self._string(element), "true" if ghost else "false",
+                                    self._string(shell), self._string(orbital), index,
+                                    "null" if step is None else step,
+                                    "null" if alpha is None else repr(alpha),
+                                    "null" if beta is None else repr(beta))
+
+    def write(self, records: Iterable[OrbitalRecord]) -> None:
+        for record in records:
+            self.stream.write(self._encode(record))
+            self.stream.write("\n")
+            self.count += 1
+
+
+class JsonWriter(JsonLinesWriter):
+    # a single JSON array of objects, streamed one object at a time
+    def begin(self) -> None:
+        self.stream.write("[")
+
+    def write(self, records: Iterable[OrbitalRecord]) -> None:
+        for record in records:
+            self.stream.write(",\n" if self.count else "\n")
+            self.stream.write(self._encode(record))
+            self.count += 1
+
+    def end(self) -> None:
+        self.stream.write("\n]\n")
+        super().end()
+
+
+class CsvWriter(RecordWriter):
+    def begin(self) -> None:
+        self._writer = csv.writer(self.stream, lineterminator="\n")
+        self._writer.writerow(RECORD_FIELDS)
+
+    def write(self, records: Iterable[OrbitalRecord]) -> None:
+        for record in records:
+            self._writer.writerow(record)
+            self.count += 1
+
+
+class NpzWriter(RecordWriter):
+    """
+    Collects the records as columns, saved as the arrays of a compressed NumPy `.npz` file by `end`.
+    """
+    def __init__(self, path: Path) -> None:
+        try:
+            import numpy
+        except ImportError:
+            raise ExportException("The [bold]npz[/] export format requires [bold italic]numpy[/] to be installed.")
+        super().__init__(None)
+        self.numpy = numpy
+        self.path = path
+        self.strings: dict[str, list[str]] = {field: [] for field in ("output", "element", "shell", "orbital")}
+        self.numbers = {"label": array("q"), "ghost": array("b"), "index": array("q"), "step": array("q"),
+                        "alpha": array("d"), "beta": array("d")}
+
+    def write(self, records: Iterable[OrbitalRecord]) -> None:
+        strings, numbers = self.strings, self.numbers
+        for output, label, element, ghost, shell, orbital, index, step, alpha, beta in records:
+            strings["output"].append(output)
+            strings["element"].append(element)
+            strings["shell"].append(shell)
+            strings["orbital"].append(orbital)
+            numbers["label"].append(label)
+            numbers["ghost"].append(ghost)
+            numbers["index"].append(index)
+            numbers["step"].append(0 if step is None else step)
+            numbers["alpha"].append(float("nan") if alpha is None else alpha)
+            numbers["beta"].append(float("nan") if beta is None else beta)
+            self.count += 1
+
+    def end(self) -> None:
+        np = self.numpy
+        columns = {field: np.array(values, dtype=str) for field, values in self.strings.items()}
+        columns |= {field: np.frombuffer(values, dtype=values.typecode) for field, values in self.numbers.items()}
+        columns["ghost"] = columns["ghost"].astype(bool)
+        with open(self.path, "wb") as file:
+            np.savez_compressed(file, **{field: columns[field] for field in RECORD_FIELDS})
+        super().end()
+
+
+def open_writer(export_format: ExportFormat, stream: TextIO, path: Optional[Path]) -> RecordWriter:
+    match export_format:
+        case ExportFormat.JSON:
+            return JsonWriter(stream)
+        case ExportFormat.NDJSON:
+            return JsonLinesWriter(stream)
+        case ExportFormat.CSV:
+            return CsvWriter(stream)
+        case ExportFormat.NPZ:
+            if path is None:
+                raise ExportException("The [bold]npz[/] export format requires an output file given with [bold]--report[/].")
+            return NpzWriter(path)
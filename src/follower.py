@@ -0,0 +1,141 @@
+from datetime import datetime
+from pathlib import Path
+from time import sleep
+from typing import Callable, Iterator
+import os
+
+from arguments import ArgumentHandler
+from columnar_output import ColumnarOutput
+from crystal_output import CrystalOutput
+from logger import Logger
+from output_parser import OutputParser
+
+
+DEFAULT_INTERVAL = 2.0  # seconds between two checks of the output file
+READ_CHUNK = 64 * 1024 * 1024
+TERMINATION_MARKER = "EEEEEEEEEE TERMINATION"
+
+
+class OutputFollower:
+    """
+    Follows an output file while CRYSTAL writes it, like `tail -f`.
+
+    The `OutputParser` is kept alive between checks: only the complete lines appended since the last check are fed
+    to it, starting at the byte offset where the previous check stopped. Between checks the follower only sleeps
+    and calls `stat`. `on_update` is called with a new output object each time a region (basis sets or a Mulliken
+    block) is complete.
+    """
+    def __init__(self,
+                 output_file: Path,
+                 arguments: ArgumentHandler,
+                 on_update: Callable[[CrystalOutput | ColumnarOutput], None],
+                 interval: float = DEFAULT_INTERVAL) -> None:
+        self.output_file = output_file
+        self.arguments = arguments
+        self.on_update = on_update
+        self.interval = interval
+        self.parser = self._new_parser()
+        self.offset = 0  # bytes of the output file fed to the parser
+        self.completed_regions = 0
+        self.finished = False  # all requested regions parsed, or CRYSTAL terminated
+
+    def _new_parser(self) -> OutputParser:
+        plan = self.arguments.query_plan
+        return OutputParser(plan.regions, self.arguments.trajectory, plan=plan)
+
+    def _complete_lines_end(self, size: int) -> int:
+        # end of the last complete line: a line still being written is read at the next check
+        with open(self.output_file, "rb") as file:
+            position = size
+            while position > 0:
+                start = max(0, position - READ_CHUNK)
+                file.seek(start)
+                newline = file.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    return start + newline + 1
+                position = start
+        return 0
+
+    def _catch_up(self, size: int) -> None:
+        # the part already written is read with the region pre-scan, as in a normal run
+        end = self._complete_lines_end(size)
+        try:
+            self.parser.feed_file(self.output_file, end)
+        except StopIteration:
+            self.finished = True
+        self.offset = end
+        Logger.debug(f"Read the first [purple]{end}[/] bytes of the output file")
+        # the termination message is in the last lines of a finished run
+        with open(self.output_file, "rb") as file:
+            file.seek(max(0, end - 4096))
+            if TERMINATION_MARKER.encode() in file.read(end - file.tell()):
+                Logger.info("CRYSTAL run terminated")
+                self.finished = True
+
+    def _new_lines(self, size: int) -> Iterator[str]:
+        # complete lines between the offset and `size`, read in chunks
+        with open(self.output_file, "rb") as file:
+            file.seek(self.offset)
+            remaining = size - self.offset
+            pending = b""
+            while remaining > 0:
+                data = file.read(min(READ_CHUNK, remaining))
+                if not data:
+                    return
+                remaining -= len(data)
+                data = pending + data
+                newline = data.rfind(b"\n")
+                if newline == -1:
+                    pending = data
+                    continue
+                pending = data[newline + 1:]
+                self.offset += newline + 1
+                for line in data[:newline].decode("utf-8", errors="replace").split("\n"):
+                    yield line.rstrip("\r")
+
+    def _feed_new_lines(self, size: int) -> None:
+        for line in self._new_lines(size):
+            if TERMINATION_MARKER in line:
+                Logger.info("CRYSTAL run terminated")
+                self.finished = True
+            try:
+                self.parser.feed(line)
+            except StopIteration:
+                self.finished = True
+            if self.finished:
+                return
+
+    def _update(self) -> None:
+        if self.parser.completed_regions == self.completed_regions and not self.finished:
+            return
+        self.completed_regions = self.parser.completed_regions
+        if not self.parser.atoms:
+            return
+        Logger.request(f"Output file updated at [purple]{datetime.now():%H:%M:%S}[/] ([purple]{self.offset}[/] bytes read):")
+        self.on_update(self.parser.build(self.arguments.columnar, complete=self.finished))
+
+    def check(self) -> None:
+        size = os.stat(self.output_file).st_size
+        if size < self.offset:
+            Logger.warn("The output file was truncated: [bold]reading it again from the start[/]")
+            self.parser = self._new_parser()
+            self.offset = 0
+            self.completed_regions = 0
+        if size == self.offset:
+            return
+        if self.offset == 0:
+            self._catch_up(size)
+        else:
+            self._feed_new_lines(size)
+        self._update()
+
+    def follow(self) -> None:
+        Logger.info(f"Following [purple]{self.output_file}[/] every [purple]{self.interval}[/] s (stop with Ctrl+C)")
+        try:
+            while True:
+                self.check()
+                if self.finished:
+                    return
+                sleep(self.interval)
+        except KeyboardInterrupt:
+            Logger.info("Stopped following the output file")
@@ -1,54 +1,158 @@
 #!/usr/bin/env python3
 
+from pathlib import Path
 from time import perf_counter
+from typing import TextIO
+import sys
 
-from arguments import parse_arguments
+from arguments import ArgumentHandler, ExportFormat, exports_to_stdout, parse_arguments
+from batch import load_outputs
 from bootstrap import init_resources
-from exceptions import ApplicationException, unexpected_error
+from columnar_output import ColumnarOutput
+from compression import detect_compression
+from crystal_output import CrystalOutput
+from daemon import run_daemon
+from exceptions import ApplicationException, ParsingException, unexpected_error
+from exporter import RecordWriter, iter_orbital_records, open_writer, select_atoms
+from follower import DEFAULT_INTERVAL, OutputFollower
 from logger import Logger
-from output_parser import OutputParser
+from metrics import Metrics, request_type
+from output_loader import load_output
 from printer import Printer
+from profiler import Profiler
 from text_style import printf
+import text_style
+
+
+WRITE_BUFFER = 1024 * 1024
+DATA_STREAM = sys.stdout  # the log is moved to stderr when exported records are written to stdout
+
+def print_requests(output_obj: CrystalOutput | ColumnarOutput, arguments: ArgumentHandler, stream: TextIO) -> None:
+    # Parse arguments and print requests
+    printer = Printer(output_obj)
+    # tables are styled only when written to a terminal
+    styled = text_style.color_enabled() and stream.isatty()
+    if not Metrics.enabled:
+        printer.write_requests(arguments.args, stream, styled)
+        return
+    # each request is timed on its own
+    for arg in arguments.args:
+        t0 = perf_counter()
+        printer.write_requests([arg], stream, styled)
+        Metrics.request(request_type(arg), perf_counter() - t0)
+
+
+def export_requests(output_obj: CrystalOutput | ColumnarOutput, output_file: Path, arguments: ArgumentHandler, writer: RecordWriter) -> None:
+    # records are written while they are created, without tables
+    t0 = perf_counter()
+    writer.write(iter_orbital_records(output_obj, output_file, select_atoms(output_obj, arguments), arguments.trajectory))
+    t1 = perf_counter()
+    if Metrics.enabled:
+        Metrics.request("export", t1 - t0)
+    delta_time = round((t1 - t0) * 1000, 1)
+    Logger.debug(f"[dim]{f" Export done in {delta_time} ms ":~^80}[/]")
 
 
 def main() -> None:
     # initialize resources
+    t0 = perf_counter()
     init_resources()
+    bootstrap_time = perf_counter() - t0
+
+    # resident daemon answering the queries of client.py
+    if "--daemon" in sys.argv:
+        sys.argv.remove("--daemon")
+        run_daemon(sys.argv[1:])
+        return
 
     # parse the arguments in the script call
+    t1 = perf_counter()
     arguments = parse_arguments()
-    output_file = arguments.get_output_file()
+    if arguments.metrics_format:
+        # written once the requests are done, see the end of the script
+        Metrics.start(t0, arguments.metrics_file, bootstrap=bootstrap_time, arguments=perf_counter() - t1)
+    output_files = arguments.get_output_files()
+
+    export_format = arguments.export_format
+    if export_format == ExportFormat.NPZ:
+        stream = None  # binary file written by the exporter
+    elif arguments.report:
+        stream = open(arguments.report, "w", encoding="utf-8", buffering=WRITE_BUFFER, newline="")
+    else:
+        stream = DATA_STREAM if export_format else sys.stdout
+    writer = open_writer(export_format, stream, arguments.report) if export_format else None
+    if writer and any(arg.value in ("-a", "-b") for arg in arguments.parameters):
+        Logger.warn(f"Tables are not printed with [bold]--format {export_format.value}[/]: ignoring [bold italic]-a[/] and [bold italic]-b[/]")
+
+    if arguments.follow:
+        if len(output_files) > 1 or writer:
+            raise ParsingException("[bold]--follow[/] takes a single output file and prints tables only.")
+        if Metrics.enabled:
+            raise ParsingException("[bold]--metrics[/] can't be used with [bold]--follow[/].")
+        if arguments.profile or arguments.memprofile:
+            raise ParsingException("[bold]-profile[/] and [bold]-memprofile[/] can't be used with [bold]--follow[/].")
+        if compression := detect_compression(output_files[0]):
+            raise ParsingException(f"[bold]--follow[/] can't read a {compression} compressed output file.")
+        interval = arguments.interval if arguments.interval else DEFAULT_INTERVAL
+        try:
+            OutputFollower(output_files[0], arguments, lambda output_obj: print_requests(output_obj, arguments, stream), interval).follow()
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        return
+
+    if arguments.profile or arguments.memprofile:
+        if len(output_files) > 1:
+            raise ParsingException("[bold]-profile[/] and [bold]-memprofile[/] take a single output file.")
+        # reported once the requests are done, see the end of the script
+        Profiler.start(output_files[0], arguments.profile, arguments.memprofile)
+
+    def handle(output_obj: CrystalOutput | ColumnarOutput, output_file: Path) -> None:
+        if writer:
+            with Profiler.stage("export"):
+                export_requests(output_obj, output_file, arguments, writer)
+        else:
+            with Profiler.stage("print"):
+                print_requests(output_obj, arguments, stream)
 
-    # parse the output file
-    parser = OutputParser()
-    t0 = perf_counter()
     try:
-        with open(output_file, "r", encoding="utf-8") as file:
-            for line in file:
-                parser.feed(line.strip("\n"))
-    except StopIteration:
-        pass
-    t1 = perf_counter()
-    delta_time = round((t1 - t0) * 1000, 1)
-    Logger.debug(f"[dim]{f" Output parsing done in {delta_time} ms ":~^80}[/]")
+        if writer:
+            writer.begin()
+        if len(output_files) == 1:
+            handle(load_output(output_files[0], arguments), output_files[0])
+            return
 
-    # create the output obj and parse the arguments
-    t0 = perf_counter()
-    output_obj = parser.build()
-    t1 = perf_counter()
-    delta_time = round((t1 - t0) * 1000, 1)
-    Logger.debug(f"[dim]{f" Output object builded in {delta_time} ms ":~^80}[/]")
-    
-    # Parse arguments and print requests
-    printer = Printer(output_obj)
-    for arg in arguments.args:
-        tables = printer.parse_argument(arg)
-        for table in tables:
-            print(table)
+        # batch mode: parse in parallel, print in the order of the script call
+        if arguments.jobs > 1:
+            Logger.warn("Ignoring [bold]--jobs[/]: several output files are already parsed in parallel")
+            arguments.jobs = 1
+        for result in load_outputs(output_files, arguments):
+            Logger.request(f"Output file: [bold purple]{result.output_file}[/]")
+            if not writer and stream is not sys.stdout:
+                print(f"{f" {result.output_file} ":=^96}", file=stream)
+            print(result.log, end="")
+            if result.metrics:
+                Metrics.files.append(result.metrics)
+            if result.output is None:
+                Logger.error(str(result.error))
+                continue
+            handle(result.output, result.output_file)
+    finally:
+        if writer:
+            writer.end()
+        if stream is not None and stream is not sys.stdout and stream is not DATA_STREAM:
+            stream.close()
+        if arguments.report:
+            Logger.info(f"Report written to [purple]{arguments.report}[/]")
 
 if __name__ == '__main__':
+    # the banner is printed before the arguments are parsed
+    if "--no-color" in sys.argv:
+        text_style.color = False
+    if exports_to_stdout(sys.argv):
+        sys.stdout = sys.stderr
     printf("[bold cyan][ C23 BASIS SET COUNTER ][/]")
-    
+
     try:
         main()
     except ApplicationException as error:
@@ -56,4 +160,11 @@ if __name__ == '__main__':
     except Exception as error:
         unexpected_error(error)
     finally:
+        if Profiler.active():
+            Profiler.stop()
+        if Metrics.enabled:
+            try:
+                Metrics.write()
+            except OSError as error:
+                Logger.error(f"Unable to write the metrics: {error}")
         printf(f"[bold cyan][ FINISHED ][/]")
@@ -0,0 +1,194 @@
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+import json
+import sys
+
+from arguments import Argument, ParameterArgument
+from columnar_output import ColumnarOutput
+from compression import detect_compression
+from crystal_output import CrystalOutput
+from output_parser import LineMatch, LineType, OutputParser, OutputRegion
+from region_index import RegionIndex
+
+
+METRICS_VERSION = 1
+
+
+@dataclass
+class FileMetrics:
+    output_file: str
+    cached: bool = False  # output object loaded from the cache
+    cache_lookup_time: float = 0.0
+    parse_time: float = 0.0
+    build_time: float = 0.0
+    bytes_read: int = 0  # bytes of output text scanned by the parser (decompressed bytes of compressed files)
+    region_times: Counter = field(default_factory=Counter)  # OutputRegion -> seconds
+    region_lines: Counter = field(default_factory=Counter)  # OutputRegion -> lines fed
+    matches: Counter = field(default_factory=Counter)  # LineType -> lines (LineType.Nothing: no pattern matched)
+    misses: Counter = field(default_factory=Counter)  # OutputRegion -> lines without any match
+    objects: dict[str, int] = field(default_factory=dict)  # objects of the output object built
+
+    def count_objects(self, output: CrystalOutput | ColumnarOutput) -> None:
+        functions = [function for basis_set in output.basis_sets for function in basis_set.basis_functions]
+        self.objects = {
+            "atoms": len(output.atoms),
+            "basis_sets": len(output.basis_sets),
+            "basis_functions": len(functions),
+            "primitives": sum(len(function.primitives) for function in functions),
+            # the columnar representation creates them when an atom is printed
+            "mulliken_populations": 0 if isinstance(output, ColumnarOutput) else sum(1 for atom in output.atoms if atom.mulliken is not None),
+            "trajectory_steps": output.trajectory.steps if output.trajectory else 0,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "output_file": self.output_file,
+            "cached": self.cached,
+            "cache_lookup_time": self.cache_lookup_time,
+            "parse_time": self.parse_time,
+            "build_time": self.build_time,
+            "bytes_read": self.bytes_read,
+            "regions": {region.name: {"time": self.region_times[region], "lines": self.region_lines[region]}
+                        for region in OutputRegion if region in self.region_times or region in self.region_lines},
+            "line_types": {line_type.name: self.matches[line_type] for line_type in LineType if line_type in self.matches},
+            "misses": {region.name: count for region, count in self.misses.items()},
+            "objects": self.objects,
+        }
+
+
+class MeasuredOutputParser(OutputParser):
+    """
+    `OutputParser` recording the time and lines of each output region, the line types matched and the objects built.
+
+    Time spent between two lines is given to the region of the first one: the region marker pre-scan of the file
+    is part of `InitialRegion`, and the lines skipped after a region are part of `Unknown`.
+    """
+    @classmethod
+    def measure(cls, parser: OutputParser, metrics: FileMetrics) -> "MeasuredOutputParser":
+        measured = cls.from_checkpoint(parser.__dict__)
+        measured.metrics = metrics
+        measured.measured_region = measured.current_output_region
+        measured.region_start = perf_counter()
+        return measured
+
+    def _measure_region(self) -> None:
+        # time since the last region change is given to the region left
+        now = perf_counter()
+        self.metrics.region_times[self.measured_region] += now - self.region_start
+        self.measured_region = self.current_output_region
+        self.region_start = now
+
+    def feed(self, line: str) -> None:
+        super().feed(line)
+        self.metrics.region_lines[self.current_output_region] += 1
+        if self.current_output_region is not self.measured_region:
+            self._measure_region()
+
+    def feed_file(self, filepath: Path, end: Optional[int] = None, start: int = 0) -> None:
+        # the bytes of compressed files are counted while they are decompressed
+        compressed = detect_compression(filepath) is not None
+        self.region_start = perf_counter()
+        try:
+            super().feed_file(filepath, end, start)
+        finally:
+            self._measure_region()
+            if not compressed:
+                self.metrics.bytes_read += (end if end is not None else filepath.stat().st_size) - start
+
+    def _feed_buffer(self, buffer: bytes, end: int) -> None:
+        self.metrics.bytes_read += end
+        super()._feed_buffer(buffer, end)
+
+    def _get_line_type(self, line: str) -> LineMatch:
+        line_match = super()._get_line_type(line)
+        self.metrics.matches[line_match.line_type] += 1
+        if line_match.line_type is LineType.Nothing:
+            self.metrics.misses[self.current_output_region] += 1
+        return line_match
+
+    def _parse_mulliken_block(self, index: RegionIndex, start: int, end: int, executor: Executor, filepath: Path) -> None:
+        # atom records parsed by the worker processes
+        sums = self.current_output_region == OutputRegion.MullikenSumValues
+        super()._parse_mulliken_block(index, start, end, executor, filepath)
+        self.metrics.matches[LineType.MullikenAtom] += len(self.mulliken_sums if sums else self.mulliken_diffs)
+
+    def _index_mulliken_block(self, index: RegionIndex, start: int, end: int, filepath: Path) -> None:
+        # atom records left in the output file
+        sums = self.current_output_region == OutputRegion.MullikenSumValues
+        super()._index_mulliken_block(index, start, end, filepath)
+        self.metrics.matches[LineType.MullikenAtom] += len(self.mulliken_sums if sums else self.mulliken_diffs)
+
+    def _save_checkpoint(self, offset: int) -> None:
+        super()._save_checkpoint(offset)
+        state = self.checkpoint[1]
+        for name in ("metrics", "measured_region", "region_start"):
+            state.pop(name, None)
+
+    def build(self, columnar: bool = False, complete: bool = True) -> CrystalOutput | ColumnarOutput:
+        output = super().build(columnar, complete)
+        self.metrics.count_objects(output)
+        return output
+
+
+def request_type(arg: Argument) -> str:
+    # "-a", "-b", "x", "number" or "range"
+    if isinstance(arg, ParameterArgument):
+        return arg.value
+    return type(arg).__name__.removesuffix("Argument").lower()
+
+
+class Metrics:
+    """
+    Per-stage metrics of a script call, written as one JSON record once the requests are done (`--metrics json`).
+    Nothing is recorded unless `start` was called.
+    """
+    enabled = False
+    started = 0.0
+    path: Optional[Path] = None  # stderr if None
+    stages: dict[str, float] = {}  # seconds
+    files: list[FileMetrics] = []
+    requests: dict[str, dict[str, float]] = {}  # request type -> count and rendering time
+
+    @classmethod
+    def start(cls, started: float, path: Optional[Path], **stages: float) -> None:
+        cls.enabled = True
+        cls.started = started
+        cls.path = path
+        cls.stages = dict(stages)
+
+    @classmethod
+    def new_file(cls, output_file: Path) -> Optional[FileMetrics]:
+        if not cls.enabled:
+            return None
+        metrics = FileMetrics(str(output_file))
+        cls.files.append(metrics)
+        return metrics
+
+    @classmethod
+    def request(cls, request: str, seconds: float) -> None:
+        entry = cls.requests.setdefault(request, {"count": 0, "time": 0.0})
+        entry["count"] += 1
+        entry["time"] += seconds
+
+    @classmethod
+    def record(cls) -> dict:
+        return {
+            "version": METRICS_VERSION,
+            "argv": sys.argv[1:],
+            "stages": {**cls.stages, "total": perf_counter() - cls.started},
+            "files": [metrics.to_dict() for metrics in cls.files],
+            "requests": cls.requests,
+        }
+
+    @classmethod
+    def write(cls) -> None:
+        # a single line, so the record can be told apart from the log on stderr
+        record = json.dumps(cls.record())
+        if cls.path is None:
+            print(record, file=sys.stderr)
+        else:
+            cls.path.write_text(record + "\n", encoding="utf-8")
@@ -0,0 +1,114 @@
+from array import array
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+import re
+
+import regex_pattern
+
+
+MIN_CHUNK_SIZE = 1024 * 1024  # bytes of Mulliken Population text parsed by one task at least
+CHUNKS_PER_WORKER = 2
+MULLIKEN_ATOM_BYTES = re.compile(regex_pattern.MULLIKEN_ATOM_REGEX.pattern.encode())
+BLANK_LINE_BYTES = re.compile(rb"^[ \t\r]*$", re.MULTILINE)
+
+
+@dataclass
+class MullikenBlock:
+    """
+    Atom records of a Mulliken Population block (α+β or α-β) as numeric arrays.
+
+    The numbers of an atom (charge, then the population of each atomic orbital) are
+    `numbers[starts[i]:starts[i + 1]]`.
+    """
+    labels: array  # 'q'
+    atomic_numbers: array  # 'q'
+    starts: array  # 'q', one more than the atoms
+    numbers: array  # 'd'
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def parse_chunk(filepath: Path, start: int, end: int) -> tuple[MullikenBlock, bool]:
+    """
+    Parses the atom records between `start` (the start of an atom record) and `end`, in a worker process.
+
+    Also returns whether a line without populations, ending the block, was found.
+    """
+    with open(filepath, "rb") as file, mmap(file.fileno(), 0, access=ACCESS_READ) as buffer:
+        text = buffer[start:end].decode("utf-8")
+
+    labels, atomic_numbers, starts, numbers = array("q"), array("q"), array("q"), array("d")
+    for line in text.splitlines():
+        if atom_match := regex_pattern.MULLIKEN_ATOM_REGEX.match(line):
+            labels.append(int(atom_match[1]))
+            atomic_numbers.append(int(atom_match[2]))
+            starts.append(len(numbers))
+            numbers.extend(map(float, regex_pattern.MULLIKEN_FLOAT3_REGEX.findall(line, atom_match.end())))
+        elif values := regex_pattern.MULLIKEN_FLOAT3_REGEX.findall(line):
+            numbers.extend(map(float, values))
+        else:
+            starts.append(len(numbers))
+            return MullikenBlock(labels, atomic_numbers, starts, numbers), True
+    starts.append(len(numbers))
+    return MullikenBlock(labels, atomic_numbers, starts, numbers), False
+
+
+def split_records(buffer: mmap, start: int, end: int, n_chunks: int) -> list[tuple[int, int]]:
+    # chunks of about the same size, each one starting at an atom record
+    bounds = [start]
+    size = (end - start) // n_chunks
+    for k in range(1, n_chunks):
+        position = max(start + k * size, bounds[-1] + 1)
+        while position < end:
+            line_start = buffer.find(b"\n", position - 1, end) + 1
+            if line_start == 0:
+                break
+            line_end = buffer.find(b"\n", line_start, end)
+            if MULLIKEN_ATOM_BYTES.match(buffer, line_start, end if line_end == -1 else line_end):
+                if line_start > bounds[-1]:
+                    bounds.append(line_start)
+                break
+            position = line_start + 1
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def parse_block(executor: Executor,
+                workers: int,
+                filepath: Path,
+                buffer: mmap,
+                start: int,
+                end: int) -> tuple[MullikenBlock, bool]:
+    """
+    Parses the atom records of a Mulliken Population block, from its first record at `start` up to `end` at most,
+    in chunks spread over the worker processes of `executor`. The chunks are merged in file order up to the end
+    of the block.
+    """
+    # the first blank line ends the block: nothing after it is sent to the workers
+    blank = BLANK_LINE_BYTES.search(buffer, start, end)
+    if blank and blank.start() < end:
+        end = blank.start()
+    else:
+        blank = None
+    n_chunks = max(1, min(workers * CHUNKS_PER_WORKER, (end - start) // MIN_CHUNK_SIZE))
+    chunks = split_records(buffer, start, end, n_chunks)
+    if len(chunks) > 1:
+        results = executor.map(parse_chunk, [filepath] * len(chunks), *zip(*chunks))
+    else:
+        results = [parse_chunk(filepath, start, end)]
+
+    block = MullikenBlock(array("q"), array("q"), array("q"), array("d"))
+    ended = blank is not None
+    for chunk, chunk_ended in results:
+        block.starts.extend(position + len(block.numbers) for position in chunk.starts[:-1])
+        block.labels.extend(chunk.labels)
+        block.atomic_numbers.extend(chunk.atomic_numbers)
+        block.numbers.extend(chunk.numbers)
+        if chunk_ended:
+            ended = True
+            break
+    block.starts.append(len(block.numbers))
+    return block, ended
@@ -0,0 +1,180 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from mmap import mmap
+from pathlib import Path
+from typing import BinaryIO, Optional
+import re
+
+from columnar_output import MullikenTrajectory
+from exceptions import OutputException
+from mulliken_chunks import MULLIKEN_ATOM_BYTES
+from population_analysis import AlphaBetaPair, MullikenPopulation
+import regex_pattern
+
+
+DECODED_RECORDS = 256  # populations of the most recently accessed atoms kept decoded
+MULLIKEN_FLOAT3_BYTES = re.compile(regex_pattern.MULLIKEN_FLOAT3_REGEX.pattern.encode())
+
+
+@dataclass
+class MullikenRecords:
+    """
+    Atom records of a Mulliken Population block (α+β or α-β) left in the output file.
+
+    Only the byte span of each record (`lengths[i]` bytes from `offsets[i]`) is kept, with the label, atomic
+    number and count of numbers (charge and populations) used to check the block against the atoms.
+    """
+    filepath: Path
+    labels: array  # 'q'
+    atomic_numbers: array  # 'q'
+    counts: array  # 'q'
+    offsets: array  # 'q'
+    lengths: array  # 'q'
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def orbital_offsets(self) -> array:
+        # number of atomic orbitals before each atom, as in MullikenTrajectory.offsets
+        offsets = array("q", [0])
+        total = 0
+        for count in self.counts:
+            total += count - 1
+            offsets.append(total)
+        return offsets
+
+    def numbers(self, file: BinaryIO, index: int) -> array:
+        # charge and populations of an atom, as parsed from the text of its record
+        file.seek(self.offsets[index])
+        numbers = array("d", map(float, MULLIKEN_FLOAT3_BYTES.findall(file.read(self.lengths[index]))))
+        if len(numbers) != self.counts[index]:
+            raise OutputException(f"Mulliken Population of [purple]Atom {self.labels[index]}[/] changed in the output file since it was parsed.")
+        return numbers
+
+
+def scan_records(filepath: Path, buffer: mmap, start: int, end: int) -> tuple[MullikenRecords, bool]:
+    """
+    Records the atom records between `start` (the start of an atom record) and `end` without decoding them.
+
+    Also returns whether a line without populations, ending the block, was found.
+    """
+    records = MullikenRecords(filepath, array("q"), array("q"), array("q"), array("q"), array("q"))
+    position = start
+    while position < end:
+        line_end = buffer.find(b"\n", position, end)
+        if line_end == -1:
+            line_end = end
+        if atom_match := MULLIKEN_ATOM_BYTES.match(buffer, position, line_end):
+            records.labels.append(int(atom_match[1]))
+            records.atomic_numbers.append(int(atom_match[2]))
+            records.counts.append(len(MULLIKEN_FLOAT3_BYTES.findall(buffer, atom_match.end(), line_end)))
+            records.offsets.append(position)
+            records.lengths.append(line_end - position)
+        elif numbers := MULLIKEN_FLOAT3_BYTES.findall(buffer, position, line_end):
+            records.counts[-1] += len(numbers)
+            records.lengths[-1] = line_end - records.offsets[-1]
+        else:
+            return records, True
+        position = line_end + 1
+    return records, False
+
+
+class LazyMullikenColumns:
+    """
+    Mulliken population of all atoms read from their records in the output file, with the same `population`
+    method as `MullikenColumns`.
+
+    The records of an atom are decoded on the first access to its population; the last `DECODED_RECORDS` are kept.
+    """
+    def __init__(self, sums: MullikenRecords, diffs: Optional[MullikenRecords]) -> None:
+        self.sums = sums
+        self.diffs = diffs  # None in closed-shell systems
+        self._decoded: OrderedDict[int, MullikenPopulation] = OrderedDict()
+
+    def __getstate__(self) -> dict:
+        # the decoded populations are not pickled (cache entries, batch results)
+        return {"sums": self.sums, "diffs": self.diffs}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["sums"], state["diffs"])
+
+    def population(self, index: int) -> "LazyMullikenPopulation":
+        return LazyMullikenPopulation(self, index)
+
+    def decode(self, index: int) -> MullikenPopulation:
+        if index in self._decoded:
+            self._decoded.move_to_end(index)
+            return self._decoded[index]
+        # the output file is open only while the records of the atom are read
+        with open(self.sums.filepath, "rb") as file:
+            sums = self.sums.numbers(file, index)
+            diffs = self.diffs.numbers(file, index) if self.diffs is not None else array("d")
+        # a trajectory of one atom gives α and β exactly as the populations parsed in full
+        step = MullikenTrajectory(1)
+        step.append(array("q", [0, len(sums) - 1]), sums[:1], sums[1:], diffs[:1], diffs[1:])
+        population = step.step().population(0)
+        self._decoded[index] = population
+        if len(self._decoded) > DECODED_RECORDS:
+            self._decoded.popitem(last=False)
+        return population
+
+
+class LazyMullikenPopulation:
+    """
+    Mulliken population of an atom, with the values of `MullikenPopulation` decoded from the output file when one
+    of them is accessed.
+    """
+    def __init__(self, columns: LazyMullikenColumns, index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    @property
+    def population(self) -> MullikenPopulation:
+        return self._columns.decode(self._index)
+
+    @property
+    def alpha_charge(self) -> Decimal:
+        return self.population.alpha_charge
+
+    @property
+    def beta_charge(self) -> Decimal:
+        return self.population.beta_charge
+
+    @property
+    def orbitals(self) -> Sequence[AlphaBetaPair]:
+        return self.population.orbitals
+
+
+class LazyMullikenTrajectory(MullikenTrajectory):
+    """
+    Last Mulliken population step of an output file, kept as the atom records of its blocks in the output file.
+    """
+    def __init__(self) -> None:
+        super().__init__(1)
+        self.sum_records: Optional[MullikenRecords] = None
+        self.diff_records: Optional[MullikenRecords] = None
+
+    def append(self, offsets: array, sums: MullikenRecords, diffs: MullikenRecords | list) -> None:
+        if self.offsets is None:
+            self.offsets = offsets
+            self.restricted_shell = not diffs
+        self.sum_records = sums
+        self.diff_records = diffs if diffs else None
+        # only the last step is kept
+        if self.steps:
+            self.first_step += 1
+        self.steps = 1
+
+    def copy(self) -> "LazyMullikenTrajectory":
+        trajectory = LazyMullikenTrajectory()
+        trajectory.__dict__.update(self.__dict__)
+        return trajectory
+
+    def step(self, number: Optional[int] = None) -> LazyMullikenColumns:
+        number = self.last_step if number is None else number
+        if number != self.last_step:
+            raise IndexError(f"step {number} is not stored")
+        return LazyMullikenColumns(self.sum_records, self.diff_records)
@@ -0,0 +1,261 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import pickle
+import zlib
+
+from columnar_output import ColumnarOutput
+from crystal_output import CrystalOutput
+from logger import Logger
+from output_parser import OutputParser, QueryPlan
+
+
+CACHE_VERSION = 6
+DEFAULT_CACHE_SIZE_MB = 512
+FINGERPRINT_CHUNK = 1024 * 1024  # bytes hashed from the head and from the tail of the output file
+
+
+def default_cache_dir() -> Path:
+    if directory := os.environ.get("BSCOUNT_CACHE_DIR"):
+        return Path(directory)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "bscount"
+
+
+def default_cache_size() -> int:
+    try:
+        return int(os.environ.get("BSCOUNT_CACHE_SIZE", DEFAULT_CACHE_SIZE_MB)) * 1024 * 1024
+    except ValueError:
+        return DEFAULT_CACHE_SIZE_MB * 1024 * 1024
+
+
+def content_digest(filepath: Path, size: int) -> str:
+    """
+    Hash of the size, the first and the last MiB of the first `size` bytes of a file.
+
+    CRYSTAL outputs only grow at the end, so the head and tail are enough to tell two versions apart
+    without reading multi-GB files; the mtime stored with each entry catches the rest.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filepath, "rb") as file:
+        digest.update(file.read(min(size, FINGERPRINT_CHUNK)))
+        if size > 2 * FINGERPRINT_CHUNK:
+            file.seek(size - FINGERPRINT_CHUNK)
+            digest.update(file.read(FINGERPRINT_CHUNK))
+        else:
+            digest.update(file.read(size - file.tell()))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheHeader:
+    version: int
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+    regions: set[str]
+    trajectory: bool  # every Mulliken step is stored, not only the last one
+    labels: Optional[frozenset[int]]  # atoms of the query plan, None for every atom
+    ghosts: bool
+    lazy: bool  # Mulliken populations left in the output file
+
+
+@dataclass
+class CheckpointHeader:
+    version: int
+    path: str
+    offset: int  # bytes of the output file parsed before the checkpoint
+    digest: str  # content digest of those bytes
+    regions: set[str]
+    trajectory: bool
+    labels: Optional[frozenset[int]]
+    ghosts: bool
+    lazy: bool
+
+
+class OutputCache:
+    """
+    On-disk cache of the `CrystalOutput` (or `ColumnarOutput`) objects built by `OutputParser`.
+
+    Each entry is a small pickled `CacheHeader` followed by the zlib-compressed pickle of the output object.
+    Next to it, a checkpoint entry holds the `OutputParser` state at the last region boundary: when the output
+    file grows, parsing resumes from there instead of starting from the first byte.
+    """
+    def __init__(self, directory: Optional[Path] = None, max_size: Optional[int] = None) -> None:
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_size = max_size if max_size is not None else default_cache_size()
+
+    def _entry_path(self, filepath: Path) -> Path:
+        key = hashlib.blake2b(str(filepath.resolve()).encode(), digest_size=16).hexdigest()
+        return self.directory / f"{key}.cache"
+
+    def _new_header(self, filepath: Path, plan: QueryPlan, trajectory: bool, lazy: bool) -> CacheHeader:
+        stat = filepath.stat()
+        return CacheHeader(CACHE_VERSION,
+                           str(filepath.resolve()),
+                           stat.st_size,
+                           stat.st_mtime_ns,
+                           content_digest(filepath, stat.st_size),
+                           {region.name for region in plan.regions},
+                           trajectory,
+                           plan.labels,
+                           plan.ghosts,
+                           lazy)
+
+    @staticmethod
+    def _is_stale(cached: CacheHeader, current: CacheHeader) -> bool:
+        return (cached.version != current.version
+                or cached.path != current.path
+                or cached.size != current.size
+                or cached.mtime_ns != current.mtime_ns
+                or cached.digest != current.digest)
+
+    def has_entry(self, filepath: Path) -> bool:
+        return self._entry_path(filepath).exists()
+
+    def load(self,
+             filepath: Path,
+             plan: QueryPlan,
+             trajectory: bool = False,
+             lazy: bool = False) -> Optional[CrystalOutput | ColumnarOutput]:
+        entry = self._entry_path(filepath)
+        if not entry.exists():
+            Logger.debug("No cached output object for this file")
+            return None
+
+        try:
+            with open(entry, "rb") as file:
+                cached: CacheHeader = pickle.load(file)
+                current = self._new_header(filepath, plan, trajectory, lazy)
+                if self._is_stale(cached, current):
+                    Logger.debug("Cached output object is stale: [bold]removing entry[/]")
+                    file.close()
+                    entry.unlink(missing_ok=True)
+                    return None
+                if not current.regions <= cached.regions:
+                    Logger.debug("Cached output object lacks the requested output regions")
+                    return None
+                if current.trajectory and not cached.trajectory:
+                    Logger.debug("Cached output object lacks the Mulliken Population of previous steps")
+                    return None
+                if not QueryPlan(frozenset(), cached.labels, cached.ghosts).includes_atoms(plan):
+                    Logger.debug("Cached output object lacks the coordinates or populations of requested atoms")
+                    return None
+                if cached.lazy and not current.lazy:
+                    Logger.debug("Cached output object lacks the Mulliken Population arrays")
+                    return None
+                output: CrystalOutput | ColumnarOutput = pickle.loads(zlib.decompress(file.read()))
+        except Exception as exc:
+            Logger.debug(f"Unable to read cache entry [purple]{entry.name}[/]: {exc}")
+            entry.unlink(missing_ok=True)
+            return None
+
+        os.utime(entry)  # most recently used
+        Logger.debug(f"Output object loaded from cache entry [purple]{entry.name}[/]")
+        return output
+
+    def store(self,
+              filepath: Path,
+              plan: QueryPlan,
+              output: CrystalOutput | ColumnarOutput,
+              trajectory: bool = False,
+              lazy: bool = False) -> None:
+        entry = self._entry_path(filepath)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            header = self._new_header(filepath, plan, trajectory, lazy)
+            payload = zlib.compress(pickle.dumps(output, pickle.HIGHEST_PROTOCOL), 1)
+            temporary = entry.with_suffix(f".{os.getpid()}.tmp")
+            with open(temporary, "wb") as file:
+                pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+                file.write(payload)
+            temporary.replace(entry)
+        except Exception as exc:
+            Logger.warn(f"Unable to write cache entry for [italic]{filepath.name}[/]: {exc}")
+            return
+        Logger.debug(f"Output object stored in cache entry [purple]{entry.name}[/]")
+        self.evict()
+
+    def load_checkpoint(self,
+                        filepath: Path,
+                        plan: QueryPlan,
+                        trajectory: bool = False,
+                        lazy: bool = False) -> Optional[tuple[int, OutputParser]]:
+        entry = self._entry_path(filepath).with_suffix(".checkpoint")
+        if not entry.exists():
+            return None
+
+        try:
+            with open(entry, "rb") as file:
+                header: CheckpointHeader = pickle.load(file)
+                if (header.version != CACHE_VERSION
+                        or header.path != str(filepath.resolve())
+                        or filepath.stat().st_size < header.offset
+                        or content_digest(filepath, header.offset) != header.digest):
+                    Logger.debug("Output file changed before the parser checkpoint: [bold]removing entry[/]")
+                    file.close()
+                    entry.unlink(missing_ok=True)
+                    return None
+                if (header.regions != {region.name for region in plan.regions} or header.trajectory != trajectory
+                        or header.labels != plan.labels or header.ghosts != plan.ghosts or header.lazy != lazy):
+                    Logger.debug("Parser checkpoint was saved for other output regions, atoms or population storage")
+                    return None
+                parser = OutputParser.from_checkpoint(pickle.loads(zlib.decompress(file.read())))
+        except Exception as exc:
+            Logger.debug(f"Unable to read checkpoint entry [purple]{entry.name}[/]: {exc}")
+            entry.unlink(missing_ok=True)
+            return None
+
+        os.utime(entry)
+        Logger.debug(f"Resuming parsing from the checkpoint at byte [purple]{header.offset}[/]")
+        return header.offset, parser
+
+    def store_checkpoint(self,
+                         filepath: Path,
+                         plan: QueryPlan,
+                         trajectory: bool,
+                         lazy: bool,
+                         offset: int,
+                         state: dict) -> None:
+        entry = self._entry_path(filepath).with_suffix(".checkpoint")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            header = CheckpointHeader(CACHE_VERSION,
+                                      str(filepath.resolve()),
+                                      offset,
+                                      content_digest(filepath, offset),
+                                      {region.name for region in plan.regions},
+                                      trajectory,
+                                      plan.labels,
+                                      plan.ghosts,
+                                      lazy)
+            temporary = entry.with_suffix(f".{os.getpid()}.tmp")
+            with open(temporary, "wb") as file:
+                pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+                file.write(zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL), 1))
+            temporary.replace(entry)
+        except Exception as exc:
+            Logger.warn(f"Unable to write checkpoint entry for [italic]{filepath.name}[/]: {exc}")
+            return
+        Logger.debug(f"Parser checkpoint at byte [purple]{offset}[/] stored in [purple]{entry.name}[/]")
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry in (*self.directory.glob("*.cache"), *self.directory.glob("*.checkpoint")):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removed by a concurrent call
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        # least recently used entries first
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            Logger.debug(f"Evicting cache entry [purple]{entry.name}[/]")
+            entry.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,106 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+from arguments import ArgumentHandler
+from columnar_output import ColumnarOutput
+from compression import detect_compression
+from crystal_output import CrystalOutput
+from logger import Logger
+from metrics import FileMetrics, MeasuredOutputParser, Metrics
+from output_cache import OutputCache
+from output_parser import OutputParser, QueryPlan
+from profiler import Profiler
+
+
+def parse_output(output_file: Path,
+                 arguments: ArgumentHandler,
+                 plan: Optional[QueryPlan] = None,
+                 cache: Optional[OutputCache] = None,
+                 metrics: Optional[FileMetrics] = None,
+                 lazy: bool = False) -> CrystalOutput | ColumnarOutput:
+    if plan is None:
+        plan = arguments.query_plan
+
+    # resume from the parser state saved by a previous call, if the output file only grew since then
+    checkpoint = cache.load_checkpoint(output_file, plan, arguments.trajectory, lazy) if cache else None
+    if checkpoint:
+        offset, parser = checkpoint
+        parser.workers = arguments.jobs
+    else:
+        offset, parser = 0, OutputParser(plan.regions, arguments.trajectory, cache is not None, arguments.jobs, plan, lazy)
+    if metrics:
+        parser = MeasuredOutputParser.measure(parser, metrics)
+
+    # parse the output file
+    t0 = perf_counter()
+    try:
+        with Profiler.stage("parse"):
+            if not parser.finished:
+                parser.feed_file(output_file, start=offset)
+    except StopIteration:
+        pass
+    t1 = perf_counter()
+    if metrics:
+        metrics.parse_time = t1 - t0
+    delta_time = round((t1 - t0) * 1000, 1)
+    Logger.debug(f"[dim]{f" Output parsing done in {delta_time} ms ":~^80}[/]")
+
+    if cache and parser.checkpoint and parser.checkpoint[0] != offset:
+        cache.store_checkpoint(output_file, plan, arguments.trajectory, lazy, *parser.checkpoint)
+
+    # create the output obj
+    t0 = perf_counter()
+    with Profiler.stage("build"):
+        output_obj = parser.build(arguments.columnar)
+    t1 = perf_counter()
+    if metrics:
+        metrics.build_time = t1 - t0
+    delta_time = round((t1 - t0) * 1000, 1)
+    Logger.debug(f"[dim]{f" Output object builded in {delta_time} ms ":~^80}[/]")
+    return output_obj
+
+
+def load_output(output_file: Path,
+                arguments: ArgumentHandler,
+                plan: Optional[QueryPlan] = None,
+                lazy: Optional[bool] = None) -> CrystalOutput | ColumnarOutput:
+    """
+    Loads the output object from the cache, or parses the output file. Only the regions and atoms of `plan` are
+    parsed (by default, the query plan of `arguments`). With `lazy`, the Mulliken populations are left in the
+    output file and decoded when they are accessed (by default, unless `arguments` export or use every step).
+    """
+    if plan is None:
+        plan = arguments.query_plan
+    if lazy is None:
+        lazy = arguments.lazy_populations
+    # compressed output files cannot be read back at the offset of an atom
+    lazy = lazy and detect_compression(output_file) is None
+
+    metrics = Metrics.new_file(output_file)
+
+    # look for a previously parsed output object
+    cache = OutputCache(arguments.cache_dir) if arguments.use_cache else None
+    if cache:
+        t0 = perf_counter()
+        with Profiler.stage("cache"):
+            output_obj = cache.load(output_file, plan, arguments.trajectory, lazy)
+        t1 = perf_counter()
+        delta_time = round((t1 - t0) * 1000, 1)
+        Logger.debug(f"[dim]{f" Cache lookup done in {delta_time} ms ":~^80}[/]")
+        if metrics:
+            metrics.cache_lookup_time = t1 - t0
+        if output_obj is not None:
+            if metrics:
+                metrics.cached = True
+                metrics.count_objects(output_obj)
+            OutputParser.log_summary(output_obj)
+            return output_obj
+        # the output file is queried again, for other atoms: every atom is parsed for the next queries
+        if plan.labels is not None and cache.has_entry(output_file):
+            plan = QueryPlan(plan.regions)
+
+    output_obj = parse_output(output_file, arguments, plan, cache, metrics, lazy)
+    if cache:
+        cache.store(output_file, plan, output_obj, arguments.trajectory, lazy)
+    return output_obj
@@ -1,19 +1,33 @@
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
-import re
+from itertools import repeat
+from lzma import LZMAError
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Sequence
 
 from atom import Atom
 from basis_set import BasisSet, BasisFunction, PrimitiveFunction, FunctionType
+from columnar_output import ColumnarOutput, MullikenTrajectory
+from compression import open_decompressed
 from crystal_output import CrystalOutput
+from element import Element
 from exceptions import OutputException, ParsingException, GhostException, format_traceback
 from logger import Logger
+from mulliken_chunks import MULLIKEN_ATOM_BYTES, MullikenBlock, parse_block
+from mulliken_records import LazyMullikenTrajectory, MullikenRecords, scan_records
 from periodic_table import PeriodicTable
-from population_analysis import MullikenPopulation, AlphaBetaPair
+from region_index import RegionIndex
 import regex_pattern
 
 
+STREAM_CHUNK = 1024 * 1024  # bytes of a decompressed stream scanned at once
+
+
 class OutputRegion(Enum):
     InitialRegion = 0
     PseudoRegion = 1
@@ -37,30 +51,105 @@ class LineType(Enum):
     Nothing = 7
 
 
-@dataclass
-class LineMatch:
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    Output regions and atoms used by the requests of a script call.
+
+    Every atom is parsed for its label, element, basis set and number of populations (the atomic orbital offsets
+    and the validation of the Mulliken Population use them), but only the atoms of the plan get their coordinates
+    and Mulliken populations decoded.
+    """
+    regions: frozenset[OutputRegion]
+    labels: Optional[frozenset[int]] = None  # None: every atom
+    ghosts: bool = False  # every ghost atom, besides `labels`
+
+    def includes(self, label: int, is_ghost: bool) -> bool:
+        return self.labels is None or label in self.labels or (is_ghost and self.ghosts)
+
+    def includes_atoms(self, other: "QueryPlan") -> bool:
+        # every atom of `other` is in this plan
+        if self.labels is None:
+            return True
+        return other.labels is not None and other.labels <= self.labels and (self.ghosts or not other.ghosts)
+
+
+class LineMatch(NamedTuple):
     line_type: LineType
-    content: list[str]
+    content: Sequence
+
+
+NO_MATCH = LineMatch(LineType.Nothing, ())
+SKIPPED_POPULATION = "0.000"  # population of the atoms out of the query plan
+# line type of each alternative of BASIS_SET_LINE_REGEX (by its last group), and the groups of its content
+BASIS_SET_LINE_TYPES = {"z": LineType.AtomLine, "function": LineType.BasisFunctionLine, "dfg": LineType.PrimitiveFunctionLine}
+BASIS_SET_LINE_GROUPS = {
+    LineType.AtomLine: slice(0, 5),
+    LineType.BasisFunctionLine: slice(5, 6),
+    LineType.PrimitiveFunctionLine: slice(6, 10),
+}
 
 
 class OutputParser:
-    def __init__(self) -> None:
+    def __init__(self,
+                 required_regions: Optional[set[OutputRegion]] = None,
+                 trajectory: bool = False,
+                 checkpoints: bool = False,
+                 workers: int = 1,
+                 plan: Optional[QueryPlan] = None,
+                 lazy: bool = False) -> None:
+        # regions needed by the requests: the parsing stops once the last one is over
+        self.required_regions = required_regions if required_regions is not None else set(OutputRegion)
+        self.last_required_region = max(self.required_regions, key=lambda region: region.value)
+        if self._requires_mulliken():
+            # Mulliken blocks are printed again at each step: the last one is only known at the end of the file
+            self.last_required_region = OutputRegion.Unknown
+
+        # atoms with coordinates and Mulliken populations (the regions of the plan are `required_regions`)
+        self.plan = plan if plan is not None else QueryPlan(frozenset(self.required_regions))
+        self.skipping_atom = False  # Mulliken Population lines of an atom out of the plan
+
         # data used to build the output object
         self.atoms: list[Atom] = []
         self.basis_sets: list[BasisSet] = []
 
         self.current_output_region = OutputRegion.InitialRegion
+        self.completed_regions = 0  # basis set and Mulliken regions parsed up to their end
 
         self.ghost_atoms_tuples = []
         self.pseudo_basis_sets = []
 
+        # lookup tables filled while parsing the regions
+        self.ghost_elements: dict[int, Element] = {}  # ghost label -> element of its basis set
+        self.basis_set_by_element: dict[int, BasisSet] = {}  # atomic number -> basis set
+        self.pseudo_atomic_numbers: set[int] = set()  # atomic numbers with ECP basis sets
+
         self.current_atom: Optional[Atom] = None
         self.current_basis_set: Optional[BasisSet] = None
         self.current_basis_function: Optional[BasisFunction] = None
 
         self.mulliken_buffer: list[str] = []
-        self.mulliken_sums: list[list[str]] = []  # alpha + beta
-        self.mulliken_diffs: list[list[str]] = []  # alpha - beta
+        # alpha + beta and alpha - beta of the current step: tokens of each atom, a block parsed by worker processes,
+        # or the records left in the output file
+        self.mulliken_sums: list[list[str]] | MullikenBlock | MullikenRecords = []
+        self.mulliken_diffs: list[list[str]] | MullikenBlock | MullikenRecords = []
+        self.workers = workers  # processes parsing large Mulliken Population blocks of memory-mapped files
+        # populations decoded from the (uncompressed) output file when they are accessed, last step only
+        self.lazy = lazy
+        self.mulliken_steps = 0  # steps found in the output file
+        # populations of the previous steps, only the last one is kept unless the trajectory is requested
+        self.trajectory = LazyMullikenTrajectory() if lazy else MullikenTrajectory(None if trajectory else 1)
+
+        # parser state saved at the last region boundary, to resume parsing once the output file has grown
+        self.checkpoints = checkpoints
+        self.checkpoint: Optional[tuple[int, dict]] = None  # byte offset, parser state
+        self.finished = False  # all required regions were parsed
+
+    @classmethod
+    def from_checkpoint(cls, state: dict) -> "OutputParser":
+        parser = cls.__new__(cls)
+        parser.__dict__.update(state)
+        return parser
 
     def feed(self, line: str) -> None:
         # Entering output region
@@ -74,8 +163,10 @@ class OutputParser:
             Logger.debug(f"Entering output region: [bold]definition of basis sets[/]")
             self.current_output_region = OutputRegion.BasisSetRegion
         elif "INFORMATION" in line and self.current_output_region == OutputRegion.BasisSetRegion:
-            self.current_output_region = OutputRegion.Unknown
+            self._leave_region()
         elif "ALPHA+BETA ELECTRONS" in line:
+            # a new α+β block starts a new step
+            self._finish_mulliken_step()
             Logger.debug(f"Entering output region: [bold]α+β Mulliken Population[/]")
             self.current_output_region = OutputRegion.MullikenSum
         elif "ALPHA-BETA ELECTRONS" in line:
@@ -107,7 +198,146 @@ class OutputParser:
             case _:
                 return
 
-    def build(self) -> CrystalOutput:
+    def feed_file(self, filepath: Path, end: Optional[int] = None, start: int = 0) -> None:
+        # feed the regions of the memory-mapped file from their marker lines, found as the parsing goes (from `start`
+        # up to `end` bytes)
+        if stream := open_decompressed(filepath):
+            if self.lazy:
+                raise OutputException("Mulliken populations cannot be read lazily from a compressed output file.")
+            with stream:
+                try:
+                    self.feed_stream(stream)
+                except (OSError, EOFError, LZMAError) as exc:
+                    raise OutputException(f"Unable to decompress the output file: {exc}")
+            return
+        with open(filepath, "rb") as file:
+            try:
+                buffer = mmap(file.fileno(), 0, access=ACCESS_READ)
+            except ValueError:  # empty file
+                return
+        parallel = self.workers > 1 and self._requires_mulliken() and not self.lazy
+        with buffer, ProcessPoolExecutor(self.workers) if parallel else nullcontext() as executor:
+            index = RegionIndex(buffer, end=end, start=start)
+            position = index.next_marker(index.start)
+            try:
+                while position < index.end:
+                    # state before the last step (α+β and α-β regions), which may still be written; parsers stopping
+                    # before the Mulliken Population save it at each boundary, without searching the next markers
+                    if (self.checkpoints and (not self._requires_mulliken() or index.is_near_end(position, 2))
+                            and self._at_boundary()):
+                        self._save_checkpoint(position)
+                    if executor or self.lazy:
+                        self._feed_slice_blocks(index, position, executor, filepath)
+                    else:
+                        self._feed_slice(index, position, index.end)
+                    position = index.next_marker(index.position)
+            except StopIteration:
+                self.finished = True
+                if self.checkpoints:
+                    self._save_checkpoint(index.position)
+                raise
+            finally:
+                Logger.debug(f"Found [purple]{len(index.offsets)}[/] region markers in the first [purple]{index.scanned}[/] bytes of the output file")
+            # a last line without its newline may still be written: the checkpoint before the last region is kept
+            if self.checkpoints and index.complete_end() == index.end and self._at_boundary():
+                self._save_checkpoint(index.end)
+
+    def feed_stream(self, stream: BinaryIO) -> None:
+        """
+        Feeds a binary stream (e.g. a decompressed output file) chunk by chunk, with the same region pre-scan as
+        `feed_file` on each chunk of complete lines. Nothing is read after the last required region.
+        """
+        pending = b""
+        while chunk := stream.read(STREAM_CHUNK):
+            buffer = pending + chunk
+            end = buffer.rfind(b"\n") + 1
+            pending = buffer[end:]
+            self._feed_buffer(buffer, end)
+        if pending:
+            self._feed_buffer(pending, len(pending))
+
+    def _feed_buffer(self, buffer: bytes, end: int) -> None:
+        index = RegionIndex(buffer, end=end)
+        # lines before the first marker belong to the region left open by the previous chunk
+        if self.current_output_region in (OutputRegion.InitialRegion, OutputRegion.Unknown):
+            position = index.next_marker(0)
+        else:
+            position = 0
+        while position < end:
+            self._feed_slice(index, position, end)
+            position = index.next_marker(index.position)
+
+    def _feed_slice(self, index: RegionIndex, start: int, end: int) -> None:
+        # lines of a region, and of the next ones if their marker comes before its end
+        for line in index.lines(start, end):
+            self.feed(line)
+            # region is over: skip the remaining lines up to the next marker
+            if self.current_output_region in (OutputRegion.InitialRegion, OutputRegion.Unknown):
+                return
+
+    def _feed_slice_blocks(self, index: RegionIndex, start: int, executor: Optional[Executor], filepath: Path) -> None:
+        # lines are fed one by one up to the first atom record of a Mulliken Population block
+        for line_start, line_end in index.line_spans(start, index.end):
+            if (self.current_output_region in (OutputRegion.MullikenSumValues, OutputRegion.MullikenDiffValues)
+                    and MULLIKEN_ATOM_BYTES.match(index.buffer, line_start, line_end)):
+                # the block ends before the next marker
+                end = index.next_marker(line_end)
+                if self.lazy:
+                    return self._index_mulliken_block(index, line_start, end, filepath)
+                return self._parse_mulliken_block(index, line_start, end, executor, filepath)
+            self.feed(index.buffer[line_start:line_end].rstrip(b"\r").decode("utf-8"))
+            if self.current_output_region in (OutputRegion.InitialRegion, OutputRegion.Unknown):
+                return
+
+    def _parse_mulliken_block(self, index: RegionIndex, start: int, end: int, executor: Executor, filepath: Path) -> None:
+        # the atom records are split in chunks parsed by the worker processes
+        block, ended = parse_block(executor, self.workers, filepath, index.buffer, start, end)
+        Logger.debug(f"Parsed [purple]{len(block)}[/] atoms of the Mulliken Population with [purple]{self.workers}[/] processes")
+        if self.current_output_region == OutputRegion.MullikenSumValues:
+            self.mulliken_sums = block
+        else:
+            self.mulliken_diffs = block
+        if ended:
+            self._leave_region()
+
+    def _index_mulliken_block(self, index: RegionIndex, start: int, end: int, filepath: Path) -> None:
+        # only the byte spans of the atom records are kept, their numbers are decoded when they are accessed
+        records, ended = scan_records(filepath, index.buffer, start, end)
+        Logger.debug(f"Indexed [purple]{len(records)}[/] atoms of the Mulliken Population")
+        if self.current_output_region == OutputRegion.MullikenSumValues:
+            self.mulliken_sums = records
+        else:
+            self.mulliken_diffs = records
+        if ended:
+            self._leave_region()
+
+    def _at_boundary(self) -> bool:
+        # between two regions, with no Mulliken step waiting for more blocks
+        if self.current_output_region not in (OutputRegion.InitialRegion, OutputRegion.Unknown):
+            return False
+        # the α-β block closes a step, and so does the α+β block of a restricted shell trajectory
+        if self.mulliken_diffs or (self.mulliken_sums and self.trajectory.restricted_shell):
+            self._finish_mulliken_step()
+        return not self.mulliken_sums
+
+    def _save_checkpoint(self, offset: int) -> None:
+        # between two regions, the objects of the regions already parsed are no longer modified:
+        # copying their containers is enough, the state is pickled only once by the cache
+        state = self.__dict__.copy()
+        for name, value in state.items():
+            if isinstance(value, (list, dict, set)):
+                state[name] = value.copy()
+        state["trajectory"] = self.trajectory.copy()
+        state["checkpoint"] = None
+        self.checkpoint = (offset, state)
+
+    def build(self, columnar: bool = False, complete: bool = True) -> CrystalOutput | ColumnarOutput:
+        """
+        Creates the output object from the parsed data.
+
+        With `complete` false (output file still being written), the parser state is left untouched, so parsing
+        can go on and `build` can be called again later.
+        """
         Logger.debug("Building output object...")
         if not self.atoms or not self.basis_sets:
              raise OutputException("Couldn't find information in the given output file. Please double check the file.")
@@ -126,39 +356,79 @@ class OutputParser:
         if encountered_ghosts != expected_ghosts:
             raise OutputException(f"Expected [purple]{expected_ghosts}[/] ghost atoms: found only [purple]{encountered_ghosts}[/].")
         
-        Logger.info(f"Number of atoms: [purple]{len(self.atoms)}[/]")
-        Logger.info(f"Number of ghost atoms: [purple]{encountered_ghosts}[/]")
-        Logger.info(f"Number of unique basis sets: [purple]{len(self.basis_sets)}[/]")
-
         # Mulliken
-        if len(self.mulliken_diffs) == 0:
-            Logger.info("Mulliken Population: [italic purple]restricted shell[/]")
-            # Closed-Shell system: α-β buffer as zero-ed replicate of α+β buffer
-            for buffer in self.mulliken_sums:
-                new_buffer = []
-                for i in buffer:
-                    if "." in i:
-                        new_buffer.append("0.000")
-                    else:
-                        new_buffer.append(i)
-                self.mulliken_diffs.append(new_buffer)
+        restricted_shell = None
+        trajectory = None
+        if self._requires_mulliken():
+            if complete:
+                self._finish_mulliken_step()
+                trajectory = self.trajectory
+            else:
+                trajectory = self._current_trajectory()
+            trajectory = trajectory if trajectory.steps else None
+            # shell type unknown until the first Mulliken block of a file still being written
+            restricted_shell = trajectory.restricted_shell if trajectory else (True if complete else None)
+        if columnar:
+            output = ColumnarOutput.from_atoms(self.atoms, self.basis_sets, None, restricted_shell, trajectory)
         else:
-            Logger.info("Mulliken Population: [italic purple]unrestricted shell[/]")
-        
-        self._build_mulliken_objects()
-        return CrystalOutput(self.atoms, self.basis_sets)
+            output = CrystalOutput(self.atoms, self.basis_sets, restricted_shell, trajectory)
+        self.log_summary(output)
+
+        if restricted_shell is None:
+            Logger.debug("Mulliken Population not requested: skipping")
+            return output
+        if trajectory is None:
+            if complete and not self.mulliken_steps:
+                Logger.warn("Unable to handle [italic]Mulliken Population Analysis[/]")
+            return output
+        # the last step is used by default
+        mulliken = trajectory.step()
+        if columnar:
+            output.mulliken = mulliken
+        else:
+            for i, atom in enumerate(self.atoms):
+                if self.plan.includes(atom.label, atom.is_ghost):
+                    atom.mulliken = mulliken.population(i)
+        return output
     
+    @staticmethod
+    def log_summary(output: CrystalOutput | ColumnarOutput) -> None:
+        Logger.info(f"Number of atoms: [purple]{len(output.atoms)}[/]")
+        Logger.info(f"Number of ghost atoms: [purple]{output.ghost_count}[/]")
+        Logger.info(f"Number of unique basis sets: [purple]{len(output.basis_sets)}[/]")
+        if output.restricted_shell is None:
+            return
+        shell = "restricted shell" if output.restricted_shell else "unrestricted shell"
+        Logger.info(f"Mulliken Population: [italic purple]{shell}[/]")
+        if output.trajectory and output.trajectory.last_step > 1:
+            Logger.info(f"Mulliken Population steps: [purple]{output.trajectory.last_step}[/] (showing the last one)")
+
+    def _leave_region(self) -> None:
+        left_region = self.current_output_region
+        self.current_output_region = OutputRegion.Unknown
+        self.completed_regions += 1
+        if left_region == self.last_required_region:
+            Logger.debug("All requested output regions were parsed: [bold]skipping the rest of the output file[/]")
+            raise StopIteration
+
+    def _requires_mulliken(self) -> bool:
+        return OutputRegion.MullikenSumValues in self.required_regions
+
     def _parse_pseudo_line(self, line: str) -> None:
         match = self._get_line_type(line)
 
         if match.line_type != LineType.Nothing:
             self.pseudo_basis_sets += match.content
+            for pseudo in match.content:
+                self.pseudo_atomic_numbers.add(PeriodicTable.get_element(int(pseudo)).atomic_number)
 
     def _parse_ghost_line(self, line: str) -> None:
         match = self._get_line_type(line)
 
         if match.line_type != LineType.Nothing:
             self.ghost_atoms_tuples += match.content
+            for (label, atomic_number) in match.content:
+                self.ghost_elements.setdefault(int(label), PeriodicTable.get_element(int(atomic_number)))
 
     def _parse_basis_set_line(self, line: str) -> None:
         line_match = self._get_line_type(line)
@@ -170,28 +440,25 @@ class OutputParser:
                 # Is ghost atom?
                 if new_atom.element.atomic_number == 0:
                     new_atom.is_ghost = True
-                    for (label, atomic_number) in self.ghost_atoms_tuples:
-                        if new_atom.label == int(label):
-                            new_atom.element = PeriodicTable.get_element(int(atomic_number))
-                            break
+                    if new_atom.label in self.ghost_elements:
+                        new_atom.element = self.ghost_elements[new_atom.label]
                     if new_atom.element.atomic_number == 0:
                         raise GhostException(f"Unexpected ghost atom found: [purple]Atom {new_atom.label}[/]")
 
+                # coordinates are decoded for the atoms of the query plan only
+                if self.plan.includes(new_atom.label, new_atom.is_ghost):
+                    new_atom.x, new_atom.y, new_atom.z = map(Decimal, line_match.content[2:])
+
                 # Exists a basis set for this atom?
-                for basis_set in self.basis_sets:
-                    # Yes, it exists
-                    if basis_set.element == new_atom.element:
-                        new_atom.basis_set = basis_set
+                atomic_number = new_atom.element.atomic_number
+                if atomic_number in self.basis_set_by_element:
+                    new_atom.basis_set = self.basis_set_by_element[atomic_number]
                 # No, create a new basis set
-                if new_atom.basis_set is None:
-                    is_pseudo_basis_set = False
-                    for pseudo in self.pseudo_basis_sets:
-                        element = PeriodicTable.get_element(int(pseudo))
-                        if element == new_atom.element:
-                            is_pseudo_basis_set = True
-                            break
+                else:
+                    is_pseudo_basis_set = atomic_number in self.pseudo_atomic_numbers
                     new_basis_set = BasisSet(new_atom.element, [], is_pseudo_basis_set)
                     self.basis_sets.append(new_basis_set)
+                    self.basis_set_by_element[atomic_number] = new_basis_set
                     new_atom.basis_set = new_basis_set
                 self.atoms.append(new_atom)
 
@@ -212,48 +479,41 @@ class OutputParser:
                 self.basis_sets[-1].basis_functions[-1].primitives.append(new_primitive)
 
     def _get_line_type(self, line: str) -> LineMatch:
+        # one anchored match per line, the matched groups are handed to the builders as a tuple
         match self.current_output_region:
             case OutputRegion.BasisSetRegion:
-                if atom_match := re.findall(regex_pattern.ATOM_REGEX, line):
-                    return LineMatch(LineType.AtomLine, atom_match)
-                elif function_match := re.findall(regex_pattern.FUNCTION_REGEX, line):
-                    return LineMatch(LineType.BasisFunctionLine, function_match)
-                elif primitive_match := re.findall(regex_pattern.PRIMITIVE_REGEX, line):
-                    return LineMatch(LineType.PrimitiveFunctionLine, primitive_match)
+                if line_match := regex_pattern.BASIS_SET_LINE_REGEX.match(line):
+                    line_type = BASIS_SET_LINE_TYPES[line_match.lastgroup]
+                    return LineMatch(line_type, line_match.groups()[BASIS_SET_LINE_GROUPS[line_type]])
             case OutputRegion.GhostRegion:
-                if ghost_match := re.findall(regex_pattern.GHOST_REGEX, line):
+                if ghost_match := regex_pattern.GHOST_REGEX.findall(line):
                     return LineMatch(LineType.GhostAtomsLine, ghost_match)
             case OutputRegion.PseudoRegion:
-                if pseudo_match := re.findall(regex_pattern.PSEUDO_REGEX, line):
+                if pseudo_match := regex_pattern.PSEUDO_REGEX.findall(line):
                     return LineMatch(LineType.PseudoLine, pseudo_match)
-            case OutputRegion.MullikenSumValues:
-                if atom_match := re.findall(regex_pattern.MULLIKEN_ATOM_REGEX, line):
-                    orbital_match = re.findall(regex_pattern.MULLIKEN_FLOAT3_REGEX, line)
-                    return LineMatch(LineType.MullikenAtom, atom_match + orbital_match)
-                elif orbital_match := re.findall(regex_pattern.MULLIKEN_FLOAT3_REGEX, line):
+            case OutputRegion.MullikenSumValues | OutputRegion.MullikenDiffValues:
+                # label, atomic number and charge + populations, or populations only on the following lines
+                if atom_match := regex_pattern.MULLIKEN_ATOM_REGEX.match(line):
+                    return LineMatch(LineType.MullikenAtom, (*atom_match.groups(),
+                                                             *regex_pattern.MULLIKEN_FLOAT3_REGEX.findall(line, atom_match.end())))
+                if orbital_match := regex_pattern.MULLIKEN_FLOAT3_REGEX.findall(line):
                     return LineMatch(LineType.MullikenOrbitals, orbital_match)
-            case OutputRegion.MullikenDiffValues:
-                if atom_match := re.findall(regex_pattern.MULLIKEN_ATOM_REGEX, line):
-                    orbital_match = re.findall(regex_pattern.MULLIKEN_FLOAT3_REGEX, line)
-                    return LineMatch(LineType.MullikenAtom, atom_match + orbital_match)
-                elif orbital_match := re.findall(regex_pattern.MULLIKEN_FLOAT3_REGEX, line):
-                    return LineMatch(LineType.MullikenOrbitals, orbital_match)
-        return LineMatch(LineType.Nothing, [])
+        return NO_MATCH
 
     @staticmethod
-    def _new_atom(regex_match: list[str]) -> Atom:
-        label, atomic_number, x, y, z = regex_match[0]
+    def _new_atom(content: tuple[str, ...]) -> Atom:
+        label, atomic_number, *_ = content
         element = PeriodicTable.get_element(atomic_number)
-        return Atom(int(label), element, None, Decimal(x), Decimal(y), Decimal(z), False)
+        return Atom(int(label), element, None, None, None, None, False)
     
     @staticmethod
-    def _new_basis_function(regex_match: list[str]) -> BasisFunction:
-        function_type = regex_match[0][-1]
+    def _new_basis_function(content: tuple[str, ...]) -> BasisFunction:
+        function_type, = content
         return BasisFunction(FunctionType[function_type], [])
     
     @staticmethod
-    def _new_primitive(regex_match: list[str]) -> PrimitiveFunction:
-        exponent, s_coeff, p_coeff, dfg_coeff = regex_match
+    def _new_primitive(content: tuple[str, ...]) -> PrimitiveFunction:
+        exponent, s_coeff, p_coeff, dfg_coeff = content
         return PrimitiveFunction(Decimal(exponent), Decimal(s_coeff), Decimal(p_coeff), Decimal(dfg_coeff))
     
     def _consume_mulliken_buffer(self) -> None:
@@ -267,32 +527,47 @@ class OutputParser:
         
         self.mulliken_buffer = []
     
+    def _diff_buffers(self) -> list[list[str]] | MullikenBlock | MullikenRecords:
+        # Closed-Shell system: the α-β population (all zeros) shares labels and lengths with the α+β one
+        return self.mulliken_diffs if self.mulliken_diffs else self.mulliken_sums
+
+    @staticmethod
+    def _atom_records(buffers: list[list[str]] | MullikenBlock | MullikenRecords) -> list[tuple[int, int, int]]:
+        # label, atomic number and count of numbers (charge and populations) of each atom
+        if isinstance(buffers, MullikenRecords):
+            return list(zip(buffers.labels, buffers.atomic_numbers, buffers.counts))
+        if isinstance(buffers, MullikenBlock):
+            starts = buffers.starts
+            return list(zip(buffers.labels, buffers.atomic_numbers, (b - a for a, b in zip(starts, starts[1:]))))
+        return [(int(buffer[0]), int(buffer[1]), len(buffer) - 2) for buffer in buffers]
+
     def _can_build_mulliken_objects(self) -> bool:
         try:
-            if len(self.mulliken_sums) != len(self.mulliken_diffs):
-                Logger.debug(f"Length of [bold]α+β buffer[/] ([bold purple]{len(self.mulliken_sums)}[/]) differs from the length of [bold]α-β buffer[/] ([bold purple]{len(self.mulliken_diffs)}[/]).")
+            sum_records = self._atom_records(self.mulliken_sums)
+            diff_records = self._atom_records(self._diff_buffers())
+            if len(sum_records) != len(diff_records):
+                Logger.debug(f"Length of [bold]α+β buffer[/] ([bold purple]{len(sum_records)}[/]) differs from the length of [bold]α-β buffer[/] ([bold purple]{len(diff_records)}[/]).")
                 return False
-            if len(self.mulliken_sums) != len(self.atoms):
-                Logger.debug(f"Length of [bold]α+β buffer[/] ([bold purple]{len(self.mulliken_sums)}[/]) differs from the total number of atoms ([bold purple]{len(self.atoms)}[/]).")
+            if len(sum_records) != len(self.atoms):
+                Logger.debug(f"Length of [bold]α+β buffer[/] ([bold purple]{len(sum_records)}[/]) differs from the total number of atoms ([bold purple]{len(self.atoms)}[/]).")
                 return False
             
-            for i, atom in enumerate(self.atoms):
+            found_bs = [bs.element for bs in self.basis_sets]
+            for atom, (sum_label, sum_number, sum_length), (diff_label, diff_number, diff_length) in zip(self.atoms, sum_records, diff_records):
                 # Lengths are ok?
-                sum_population = self.mulliken_sums[i]
-                diff_population = self.mulliken_diffs[i]
-                if len(sum_population) != len(diff_population):
-                    Logger.debug(f"Length of [bold]α+β population[/] ([purple]{len(sum_population)}[/]) differs from the length of [bold]α-β population[/] ([purple]{len(diff_population)}[/]) for atom [bold]{atom.label}[/].")
+                if sum_length != diff_length:
+                    Logger.debug(f"Length of [bold]α+β population[/] ([purple]{sum_length}[/]) differs from the length of [bold]α-β population[/] ([purple]{diff_length}[/]) for atom [bold]{atom.label}[/].")
                     return False
                 # Labels are ok?
-                if not int(sum_population[0]) == atom.label:
-                    Logger.debug(f"Expected [bold]α+β population[/] for atom [purple]{atom.label}[/] but found atom [purple]{sum_population[0]}[/].")
+                if not sum_label == atom.label:
+                    Logger.debug(f"Expected [bold]α+β population[/] for atom [purple]{atom.label}[/] but found atom [purple]{sum_label}[/].")
                     return False
-                if not int(diff_population[0]) == atom.label:
-                    Logger.debug(f"Expected [bold]α-β population[/] for atom [purple]{atom.label}[/] but found atom [purple]{diff_population[0]}[/].")
+                if not diff_label == atom.label:
+                    Logger.debug(f"Expected [bold]α-β population[/] for atom [purple]{atom.label}[/] but found atom [purple]{diff_label}[/].")
                     return False
                 # Elements are ok?
-                sum_element = PeriodicTable.get_element(int(sum_population[1]))
-                diff_element = PeriodicTable.get_element(int(diff_population[1]))
+                sum_element = PeriodicTable.get_element(sum_number)
+                diff_element = PeriodicTable.get_element(diff_number)
                 if not sum_element == atom.element:
                     # is not ghost
                     if not sum_element.atomic_number == 0:
@@ -304,7 +579,6 @@ class OutputParser:
                         Logger.debug(f"Expected [purple]Z = {atom.element.atomic_number}[/] for [purple]Atom {atom.label}[/], but found [purple]Z = {diff_element.atomic_number}[/] in [bold]α-β population[/].")
                         return False
                 # There is a basis set for the element?
-                found_bs = [bs.element for bs in self.basis_sets]
                 if not sum_element in found_bs:
                     # is not ghost
                     if not sum_element.atomic_number == 0:
@@ -316,25 +590,85 @@ class OutputParser:
             Logger.debug(format_traceback(exc))
             return False
 
-    def _build_mulliken_objects(self) -> None:
-        Logger.debug(f"Building Mulliken objects")
+    @staticmethod
+    def _block_columns(buffers: list[list[str]] | MullikenBlock) -> tuple[array, array, array]:
+        # (offsets, charges, populations) of a block, populations in a flat double array
+        offsets = array("q", [0])
+        charges, populations = array("d"), array("d")
+        if isinstance(buffers, MullikenBlock):
+            numbers, starts = buffers.numbers, buffers.starts
+            for start, end in zip(starts, starts[1:]):
+                charges.append(numbers[start])
+                populations.extend(numbers[start + 1:end])
+                offsets.append(len(populations))
+            return offsets, charges, populations
+        # the tokens are converted in C by map/extend
+        for buffer in buffers:
+            charges.append(float(buffer[2]))
+            populations.extend(map(float, buffer[3:]))
+            offsets.append(len(populations))
+        return offsets, charges, populations
+
+    def _convert_mulliken_step(self) -> Optional[tuple[array, array, array, array, array] | tuple[array, MullikenRecords, MullikenRecords | list]]:
+        # α+β and α-β blocks of the current step as (offsets, α+β charges, α+β, α-β charges, α-β) float arrays,
+        # or as (offsets, α+β records, α-β records) when the populations are left in the output file
         if not self._can_build_mulliken_objects():
-            Logger.warn("Unable to handle [italic]Mulliken Population Analysis[/]")
+            return None
+        if isinstance(self.mulliken_sums, MullikenRecords):
+            return self.mulliken_sums.orbital_offsets(), self.mulliken_sums, self.mulliken_diffs
+        offsets, sum_charges, sums = self._block_columns(self.mulliken_sums)
+        _, diff_charges, diffs = self._block_columns(self.mulliken_diffs)
+        return offsets, sum_charges, sums, diff_charges, diffs
+
+    def _finish_mulliken_step(self) -> None:
+        # move the current step to the trajectory, then free its tokens
+        if not self.mulliken_sums:
             return
+        self.mulliken_steps += 1
+        step = self._convert_mulliken_step()
+        self.mulliken_sums, self.mulliken_diffs = [], []
+        if step is None:
+            Logger.warn(f"Unable to handle [italic]Mulliken Population Analysis[/] of step [purple]{self.mulliken_steps}[/]: skipping")
+            return
+        offsets, *_, diffs = step
+        if not self.trajectory.accepts(offsets, not diffs):
+            Logger.warn(f"Atomic orbitals of [italic]Mulliken Population Analysis[/] step [purple]{self.mulliken_steps}[/] differ from the first step: skipping")
+            return
+        self.trajectory.append(*step)
 
-        for i, atom in enumerate(self.atoms):
-            # change values from populations to decimal
-            sum_charge, *sum_values = [Decimal(x) for x in self.mulliken_sums[i][2:]]
-            diff_charge, *diff_values = [Decimal(x) for x in self.mulliken_diffs[i][2:]]
-            mul_pop = MullikenPopulation(sum_charge, diff_charge, [])
-            # create population objects
-            for i in range(len(sum_values)):
-                alpha = (sum_values[i] + diff_values[i]) / 2
-                beta = sum_values[i] - alpha
-                mul_pop.orbitals.append(AlphaBetaPair(alpha, beta))
-            atom.mulliken = mul_pop
+    def _current_trajectory(self) -> MullikenTrajectory:
+        # trajectory with the step still in the buffers, leaving the parser state untouched
+        if not self.mulliken_sums:
+            return self.trajectory
+        step = self._convert_mulliken_step()
+        if step is None:
+            return self.trajectory
+        offsets, *_, diffs = step
+        # e.g. α-β block not written yet: the previous step is the last complete one
+        if not self.trajectory.accepts(offsets, not diffs):
+            return self.trajectory
+        trajectory = self.trajectory.copy()
+        trajectory.append(*step)
+        return trajectory
+
+    def _skip_mulliken_line(self, line: str) -> bool:
+        # atoms out of the query plan: only their label, atomic number and number of populations are recorded
+        if atom_match := regex_pattern.MULLIKEN_ATOM_REGEX.match(line):
+            label, atomic_number = atom_match.groups()
+            self.skipping_atom = not self.plan.includes(int(label), atomic_number == "0")
+            if not self.skipping_atom:
+                return False
+            self._consume_mulliken_buffer()
+            self.mulliken_buffer = [label, atomic_number, *repeat(SKIPPED_POPULATION, line.count(".", atom_match.end()))]
+            return True
+        if self.skipping_atom and regex_pattern.MULLIKEN_FLOAT3_REGEX.search(line):
+            self.mulliken_buffer += repeat(SKIPPED_POPULATION, line.count("."))
+            return True
+        return False
 
     def _parse_mulliken_population(self, line: str) -> None:
+        if self.plan.labels is not None and self._skip_mulliken_line(line):
+            return
         line_match = self._get_line_type(line)
 
         # flag the end of Mulliken A+B and A-B regions
@@ -343,7 +677,7 @@ class OutputParser:
                 if not len(self.mulliken_buffer) > 0:
                     return
                 self._consume_mulliken_buffer()
-                self.current_output_region = OutputRegion.Unknown
+                self._leave_region()
                 return
             case LineType.MullikenAtom:
                 self._consume_mulliken_buffer()
@@ -4,21 +4,32 @@ from exceptions import PeriodicTableException
 
 class PeriodicTable:
     elements: list[Element] = []
+    _by_atomic_number: dict[int, Element] = {}
+    _by_symbol: dict[str, Element] = {}
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.elements.clear()
+        cls._by_atomic_number.clear()
+        cls._by_symbol.clear()
+
+    @classmethod
+    def add_element(cls, element: Element) -> None:
+        cls.elements.append(element)
+        cls._by_atomic_number[element.atomic_number] = element
+        cls._by_symbol[element.symbol] = element
     
     @classmethod
     def get_element(cls, key: str | int) -> Element:
         if isinstance(key, str):  # Lookup by symbol
-            key = key.capitalize()
-            for element in cls.elements:
-                if element.symbol == key:
-                    return element
+            if element := cls._by_symbol.get(key.capitalize()):
+                return element
         elif isinstance(key, int):  # Lookup by atomic number
             # for Effective Core Potential basis sets
             if key > 200:
                 key %= 200
             if key < 0 or key > 118:
                 raise PeriodicTableException(f"Invalid atomic number: '{key}'.")
-            for element in cls.elements:
-                if element.atomic_number == key:
-                    return element
-        raise PeriodicTableException(f"Element '{key}' does not exist.")
\ No newline at end of file
+            if element := cls._by_atomic_number.get(key):
+                return element
+        raise PeriodicTableException(f"Element '{key}' does not exist.")
@@ -1,67 +1,68 @@
+from typing import Iterator, TextIO
+
 from arguments import *
 from atom import Atom
 from basis_set import FunctionType
+from columnar_output import ColumnarOutput
 from crystal_output import CrystalOutput
 from logger import Logger
 from orbitals import AtomicOrbitals
 from population_analysis import AlphaBetaPair
-from table import Table, Header, Row, Cell, CellAlignment, CellContentType
+from table import Table, Header, Row, Cell, CellAlignment, CellContentType, ColumnSpec, CompiledRow, RowLayout
+import text_style
 
 
 class Printer:
-    def __init__(self, output: CrystalOutput) -> None:
+    def __init__(self, output: CrystalOutput | ColumnarOutput) -> None:
         self.output = output
     
-    def _atoms_info(self) -> list[Table]:
+    ATOM_LAYOUT = RowLayout([
+        ColumnSpec(6, CellAlignment.LEFT, CellContentType.DIGIT),
+        ColumnSpec(12, CellAlignment.CENTER),
+        ColumnSpec(12, CellAlignment.CENTER_SPACE_PADDING, CellContentType.DECIMAL, precision=3),
+        ColumnSpec(12, CellAlignment.CENTER_SPACE_PADDING, CellContentType.DECIMAL, precision=3),
+        ColumnSpec(12, CellAlignment.CENTER_SPACE_PADDING, CellContentType.DECIMAL, precision=3),
+        ColumnSpec(16, CellAlignment.RIGHT)
+    ])
+
+    def _atom_rows(self) -> Iterator[tuple | CompiledRow]:
+        offsets = self.output.orbital_offsets
+        ghost_layout = self.ATOM_LAYOUT.with_style("purple")
+        for i, atom in enumerate(self.output.atoms):
+            orbitals = f"{offsets[i] + 1: d}-{offsets[i + 1]}"
+            if atom.is_ghost:
+                yield CompiledRow(ghost_layout, (atom.label, f"{atom.element.symbol} (ghost)", atom.x, atom.y, atom.z, orbitals))
+            else:
+                yield (atom.label, atom.element.symbol, atom.x, atom.y, atom.z, orbitals)
+
+    def _atoms_info(self) -> Iterator[Table]:
         Logger.request("Atoms from basis set region of output file:")
         # create table and table header
         header_row = Row([
             Cell("Label"), Cell("Element"), Cell("X (a.u.)"), Cell("Y (a.u.)"), Cell("Z (a.u.)"), Cell("Atomic orbitals")
         ])
         header = Header([header_row])
-        table = Table(header, [])
+        # rows of atoms are created while the table is written
+        table = Table(header, self._atom_rows(), self.ATOM_LAYOUT)
 
-        # populate rows of table with atoms
-        c = 0
-        local_count = 0
-        last_count = 0
-        for atom in self.output.atoms:
-            if atom.basis_set is not None:
-                for basis_function in atom.basis_set.basis_functions:
-                    local_count += basis_function.function_type.value
-            
-            element_str = f"{atom.element.symbol} (ghost)" if atom.is_ghost else atom.element.symbol
-            atom_row = Row([
-                Cell(atom.label, content_type=CellContentType.DIGIT),
-                Cell(element_str),
-                Cell(atom.x, CellContentType.DECIMAL, precision=3),
-                Cell(atom.y, CellContentType.DECIMAL, precision=3),
-                Cell(atom.z, CellContentType.DECIMAL, precision=3),
-                Cell(f"{last_count + 1: d}-{local_count}")
-            ])
-            if atom.is_ghost:
-                atom_row.add_style("purple")
-            table.rows.append(atom_row)
-            last_count = local_count
-        # format table
+        # format table header (rows are created formatted)
         table.add_row_style.header("bold", 0)
-        table.set_column_alignment.table(CellAlignment.LEFT, 0)
-        table.set_column_alignment.table(CellAlignment.CENTER, 1)
-        table.set_column_alignment.table(CellAlignment.CENTER_SPACE_PADDING, 2)
-        table.set_column_alignment.table(CellAlignment.CENTER_SPACE_PADDING, 3)
-        table.set_column_alignment.table(CellAlignment.CENTER_SPACE_PADDING, 4)
-        table.set_column_alignment.table(CellAlignment.RIGHT, 5)
-        table.set_column_size.table(6, 0)
-        table.set_column_size.table(12, 1)
-        table.set_column_size.table(12, 2)
-        table.set_column_size.table(12, 3)
-        table.set_column_size.table(12, 4)
-        table.set_column_size.table(16, 5)
-        return [table]
+        table.set_column_alignment.header(CellAlignment.LEFT, 0)
+        table.set_column_alignment.header(CellAlignment.CENTER, 1)
+        table.set_column_alignment.header(CellAlignment.CENTER_SPACE_PADDING, 2)
+        table.set_column_alignment.header(CellAlignment.CENTER_SPACE_PADDING, 3)
+        table.set_column_alignment.header(CellAlignment.CENTER_SPACE_PADDING, 4)
+        table.set_column_alignment.header(CellAlignment.RIGHT, 5)
+        table.set_column_size.header(6, 0)
+        table.set_column_size.header(12, 1)
+        table.set_column_size.header(12, 2)
+        table.set_column_size.header(12, 3)
+        table.set_column_size.header(12, 4)
+        table.set_column_size.header(16, 5)
+        yield table
 
-    def _basis_sets_info(self) -> list[Table]:
+    def _basis_sets_info(self) -> Iterator[Table]:
         Logger.request("Basis sets in the output file:")
-        tables: list[Table] = []
         for basis_set in self.output.basis_sets:
             atoms_using = 0
             basis_function_count = 0
@@ -127,16 +128,13 @@ class Printer:
             table.set_column_size.content(16, 2)
             table.set_column_size.content(16, 3)
             table.set_column_size.content(16, 4)
-            tables.append(table)
-        return tables
+            yield table
     
-    def _parse_ghost_atoms(self) -> list[Table]:
+    def _parse_ghost_atoms(self) -> Iterator[Table]:
         Logger.request("Ghost atoms in the output file:")
-        tables: list[Table] = []
-        for atom in self.output.atoms:
+        for i, atom in enumerate(self.output.atoms):
             if atom.is_ghost:
-                tables += self._parse_atom(atom.label)
-        return tables
+                yield from self._count_atom(self.output.orbital_offsets[i], atom)
     
     @staticmethod
     def _new_atomic_function_row(index: int, function: str, pop: Optional[AlphaBetaPair]) -> Row:
@@ -184,7 +182,7 @@ class Printer:
         # header - basis set type
         basis_set_type_row = Row([
             Cell("Effective Core Potential basis set" if atom.basis_set.pseudo else "All-electron basis set", size=48, alignment=CellAlignment.CENTER),
-            Cell("" if self.output.atoms[0].mulliken else "not available in output", size=48, alignment=CellAlignment.CENTER)
+            Cell("" if atom.mulliken else "not available in output", size=48, alignment=CellAlignment.CENTER)
         ])
         basis_set_type_row.add_style("bold purple")
 
@@ -245,55 +243,55 @@ class Printer:
         return [table]
     
     def _parse_atom(self, label: int) -> list[Table]:
-        local_count = 0
-        tables: list[Table] = []
-        for atom in self.output.atoms:
-            if atom.basis_set is not None:
-                if atom.label == label:
-                    this_count = local_count
-                    for basis_function in atom.basis_set.basis_functions:
-                        this_count += basis_function.function_type.value
-                    tables += self._count_atom(local_count, atom)
-                    break
-                else:
-                    for basis_function in atom.basis_set.basis_functions:
-                        local_count += basis_function.function_type.value
-        return tables
+        index = self.output.label_index.get(label)
+        if index is None:
+            return []
+        return self._count_atom(self.output.orbital_offsets[index], self.output.atoms[index])
 
-    def _parse_number_argument(self, arg: NumberArgument) -> list[Table]:
+    def _parse_number_argument(self, arg: NumberArgument) -> Iterator[Table]:
         Logger.debug(f"Parsing number argument: [purple]{arg.value}[/]")
         Logger.request(f"Enumeration for [purple]Atom {arg.value}[/]:")
-        return self._parse_atom(int(arg.value))
+        yield from self._parse_atom(int(arg.value))
     
-    def _parse_range_argument(self, arg: RangeArgument) -> list[Table]:
+    def _parse_range_argument(self, arg: RangeArgument) -> Iterator[Table]:
         Logger.debug(f"Parsing range argument: [purple]{arg.value}[/]")
         Logger.request(f"Enumeration for [purple]Atoms {arg.value}[/]:")
         limits = arg.value.split("-")
         x, y = int(limits[0]), int(limits[1]) + 1
-        tables: list[Table] = []
         if x > y:
             for i in range(x, y - 2, -1):
-                tables += self._parse_atom(i)
+                yield from self._parse_atom(i)
         else:
             for i in range(x, y):
-                tables += self._parse_atom(i)
-        return tables
+                yield from self._parse_atom(i)
 
-    def _parse_parameter_argument(self, arg: ParameterArgument) -> list[Table]:
+    def _parse_parameter_argument(self, arg: ParameterArgument) -> Iterator[Table]:
         Logger.debug(f"Parsing parameter argument: [purple]{arg.value}[/]")
         if arg.value == "-a":
-            return self._atoms_info()
+            yield from self._atoms_info()
         elif arg.value == "-b":
-            return self._basis_sets_info()
+            yield from self._basis_sets_info()
         elif arg.value == "x":
-            return self._parse_ghost_atoms()
-        return []
+            yield from self._parse_ghost_atoms()
 
-    def parse_argument(self, arg: Argument) -> list[Table]:
+    def iter_argument(self, arg: Argument) -> Iterator[Table]:
+        """
+        Yields the tables of a request one at a time, as they are created.
+        """
         PARSE_MAP = {
             NumberArgument: self._parse_number_argument,
             RangeArgument: self._parse_range_argument,
             ParameterArgument: self._parse_parameter_argument
         }
 
-        return PARSE_MAP[type(arg)](arg)
\ No newline at end of file
+        yield from PARSE_MAP[type(arg)](arg)
+
+    def parse_argument(self, arg: Argument) -> list[Table]:
+        return list(self.iter_argument(arg))
+
+    def write_requests(self, args: list[Argument], stream: TextIO, styled: bool) -> None:
+        for arg in args:
+            # tables are written line by line while they are created
+            for table in self.iter_argument(arg):
+                with text_style.colors(styled):
+                    table.write(stream)
\ No newline at end of file
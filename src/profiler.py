@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+import cProfile
+import pstats
+import tracemalloc
+
+from logger import Logger
+
+
+TOP_FUNCTIONS = 15  # hot functions in the report
+TOP_MODULES = 5  # allocating modules of each stage in the report
+
+
+@dataclass
+class StageMemory:
+    name: str
+    peak: int  # bytes allocated above the memory at the start of the stage, at most
+    retained: int  # bytes still allocated at the end of the stage
+    modules: list[tuple[str, int]]  # allocating module -> bytes retained, largest first
+
+
+def _module_name(filename: str) -> str:
+    # "output_parser" for ".../src/output_parser.py", "<frozen importlib._bootstrap>" as it is
+    return Path(filename).stem if filename.endswith(".py") else filename
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 1024**2:+.1f} MB" if abs(size) >= 1024**2 else f"{size / 1024:+.1f} KB"
+
+
+class Profiler:
+    """
+    Profile of the stages of a script call: functions timed by cProfile (`-profile`) and memory allocated in each
+    stage traced by tracemalloc (`-memprofile`). Stages are measured only once `start` was called.
+    """
+    profile: Optional[cProfile.Profile] = None
+    pstats_file: Optional[Path] = None
+    tracing = False
+    stages: list[StageMemory] = []
+
+    @classmethod
+    def start(cls, output_file: Path, profile: bool, memory: bool) -> None:
+        if memory:
+            tracemalloc.start()
+            cls.tracing = True
+        if profile:
+            cls.pstats_file = Path(f"{output_file.name}.pstats")
+            cls.profile = cProfile.Profile()
+            cls.profile.enable()
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name: str) -> Iterator[None]:
+        if not cls.tracing:
+            yield
+            return
+        # the snapshots are neither profiled nor counted in the stage
+        cls._pause_profile()
+        before = tracemalloc.take_snapshot()
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        cls._resume_profile()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            cls._pause_profile()
+            modules: dict[str, int] = {}
+            for difference in tracemalloc.take_snapshot().compare_to(before, "filename"):
+                filename = difference.traceback[0].filename
+                if filename != tracemalloc.__file__:
+                    module = _module_name(filename)
+                    modules[module] = modules.get(module, 0) + difference.size_diff
+            largest = sorted(modules.items(), key=lambda item: -abs(item[1]))[:TOP_MODULES]
+            cls.stages.append(StageMemory(name, peak - start, current - start, largest))
+            cls._resume_profile()
+
+    @classmethod
+    def _pause_profile(cls) -> None:
+        if cls.profile:
+            cls.profile.disable()
+
+    @classmethod
+    def _resume_profile(cls) -> None:
+        if cls.profile:
+            cls.profile.enable()
+
+    @classmethod
+    def active(cls) -> bool:
+        return cls.profile is not None or cls.tracing
+
+    @classmethod
+    def stop(cls) -> None:
+        # writes the pstats file and logs the report
+        if cls.profile:
+            cls.profile.disable()
+            cls.profile.dump_stats(cls.pstats_file)
+            cls._log_functions(pstats.Stats(cls.profile))
+            Logger.info(f"Profile written to [purple]{cls.pstats_file}[/] (read it with [italic]python -m pstats[/])")
+            cls.profile = None
+        if cls.tracing:
+            tracemalloc.stop()
+            cls.tracing = False
+            cls._log_stages()
+
+    @staticmethod
+    def _log_functions(stats: pstats.Stats) -> None:
+        Logger.info(f"Hot functions (top {TOP_FUNCTIONS} by own time):")
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:TOP_FUNCTIONS]
+        print(f"{'own time':>10}{'cumulative':>12}{'calls':>10}  function")
+        for (filename, line, function), (_, calls, own_time, cumulative, _) in rows:
+            location = f"{_module_name(filename)}:{line}" if line else _module_name(filename)
+            print(f"{own_time * 1000:>7.1f} ms{cumulative * 1000:>9.1f} ms{calls:>10}  {location}({function})")
+
+    @classmethod
+    def _log_stages(cls) -> None:
+        Logger.info(f"Memory of each stage (top {TOP_MODULES} allocating modules by retained memory):")
+        for stage in cls.stages:
+            print(f"{stage.name:<8} peak {_format_size(stage.peak):>12}   retained {_format_size(stage.retained):>12}")
+            for module, size in stage.modules:
+                print(f"{'':<8} {module:<40}{_format_size(size):>12}")
+        cls.stages = []
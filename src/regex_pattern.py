@@ -7,10 +7,15 @@ RANGE_ARG_REGEX = re.compile(r"^[0-9]+-[0-9]+$")
 # File parsing patterns
 PSEUDO_REGEX = re.compile(r"ATOMIC NUMBER\s+(\d+),")
 GHOST_REGEX = re.compile(r"(\d+)\(\s+(\d+)\)")
-ATOM_REGEX = re.compile(r"\s+(\d+)\s+(\w+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)")
-FUNCTION_REGEX = re.compile(r"^\s+(\d+)?-?\s+(\d+)\s(\w+)\s+$")
-PRIMITIVE_REGEX = re.compile(r"\s?(-?\d\.\d+E[+-]\d\d)")
-MULLIKEN_ATOM_REGEX = re.compile(r"\s+(\d+)\s+")
+# basis set region: atom, basis function or primitive line, told apart by the matching alternative
+BASIS_SET_LINE_REGEX = re.compile(
+    r"\s+(?P<label>\d+)\s+(?P<element>\w+)\s+(?P<x>-?\d+\.\d+)\s+(?P<y>-?\d+\.\d+)\s+(?P<z>-?\d+\.\d+)"
+    r"|\s+(?:\d+)?-?\s+\d+\s(?P<function>\w+)\s+$"
+    r"|\s*(?P<exponent>-?\d\.\d+E[+-]\d\d)\s*(?P<s>-?\d\.\d+E[+-]\d\d)\s*(?P<p>-?\d\.\d+E[+-]\d\d)"
+    r"\s*(?P<dfg>-?\d\.\d+E[+-]\d\d)"
+)
+# label and atomic number at the start of the first line of an atom in the Mulliken population
+MULLIKEN_ATOM_REGEX = re.compile(r"\s*(\d+)\s+(?:[A-Za-z]+\s+)?(\d+)\s")
 MULLIKEN_FLOAT3_REGEX = re.compile(r"[+-]?\d+\.\d{3}")
 
 # Text style
@@ -0,0 +1,94 @@
+from bisect import bisect_left
+from mmap import mmap
+from typing import Iterator, Optional
+
+
+SCAN_WINDOW = 4 * 1024 * 1024  # bytes searched for region markers at once
+
+
+# Markers of the output regions handled by OutputParser.feed
+REGION_MARKERS = (
+    b"PSEUDOPOTENTIAL INFORMATION",
+    b"ATOMS TRANSFORMED INTO GHOSTS",
+    b"LOCAL ATOMIC FUNCTIONS BASIS SET",
+    b"ALPHA+BETA ELECTRONS",
+    b"ALPHA-BETA ELECTRONS",
+)
+
+
+class RegionIndex:
+    """
+    Byte offsets of the lines holding a region marker in a memory-mapped output file (or in a chunk of bytes).
+
+    Markers are searched lazily, one window of `SCAN_WINDOW` bytes at a time, as the parser asks for the next one:
+    once the parser stops, the rest of the file is neither searched nor paged in. Each marker line starts a region
+    that the parser feeds until it leaves it, and lines between the end of a region and the next marker are never
+    decoded. Bytes before `start` and after `end` are ignored.
+    """
+    def __init__(self,
+                 buffer: mmap | bytes,
+                 markers: tuple[bytes, ...] = REGION_MARKERS,
+                 end: Optional[int] = None,
+                 start: int = 0) -> None:
+        self.buffer = buffer
+        self.markers = markers
+        self.start = start
+        self.end = len(buffer) if end is None else end
+        self.offsets: list[int] = []  # marker lines found so far, in file order
+        self.scanned = start  # markers starting before this offset are in `offsets`
+        self.position = start  # end of the last line read by `lines` or `line_spans`
+
+    def _scan_window(self) -> None:
+        window_end = min(self.scanned + SCAN_WINDOW, self.end)
+        # markers starting in the window may end after it
+        search_end = min(window_end + max(len(marker) for marker in self.markers) - 1, self.end)
+        found: set[int] = set()
+        for marker in self.markers:
+            position = self.buffer.find(marker, self.scanned, search_end)
+            while position != -1 and position < window_end:
+                found.add(max(self.buffer.rfind(b"\n", 0, position) + 1, self.start))
+                position = self.buffer.find(marker, position + len(marker), search_end)
+        # two markers of a line split across windows give the same offset
+        self.offsets.extend(offset for offset in sorted(found) if not self.offsets or offset > self.offsets[-1])
+        self.scanned = window_end
+
+    def _markers_from(self, position: int, count: int) -> list[int]:
+        # the first `count` marker lines at or after `position` (fewer near the end)
+        first = bisect_left(self.offsets, position)
+        while len(self.offsets) - first < count and self.scanned < self.end:
+            self._scan_window()
+        return self.offsets[first:first + count]
+
+    def next_marker(self, position: int) -> int:
+        # offset of the first marker line at or after `position`, `end` if there is none
+        markers = self._markers_from(position, 1)
+        return markers[0] if markers else self.end
+
+    def is_near_end(self, position: int, count: int) -> bool:
+        # at most `count` marker lines at or after `position`
+        return len(self._markers_from(position, count + 1)) <= count
+
+    def complete_end(self) -> int:
+        # end of the last complete line: a line without its newline may still be written
+        return max(self.buffer.rfind(b"\n", self.start, self.end) + 1, self.start)
+
+    def line_spans(self, start: int, end: int) -> Iterator[tuple[int, int]]:
+        # (start, end) byte offsets of each line, without its newline
+        position = start
+        while position < end:
+            line_end = self.buffer.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+            self.position = min(line_end + 1, end)
+            yield position, line_end
+            position = line_end + 1
+
+    def lines(self, start: int, end: int) -> Iterator[str]:
+        position = start
+        while position < end:
+            line_end = self.buffer.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+            self.position = min(line_end + 1, end)
+            yield self.buffer[position:line_end].rstrip(b"\r").decode("utf-8")
+            position = line_end + 1
@@ -1,6 +1,8 @@
+from dataclasses import dataclass, replace
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, TextIO
 
 from exceptions import CellException, TableException
 import text_style
@@ -24,6 +26,122 @@ class CellAlignment(Enum):
 type CellContent = str | int | float | Decimal
 
 
+@dataclass(frozen=True)
+class ColumnSpec:
+    size: int = 8
+    alignment: CellAlignment = CellAlignment.LEFT
+    content_type: CellContentType = CellContentType.TEXT
+    precision: Optional[int] = None
+    style: str = ""
+
+    def compile(self) -> "CompiledColumn":
+        # ANSI sequences depend on whether colors are enabled
+        return _compile_column(self, text_style.color_enabled())
+
+
+class CompiledColumn:
+    """
+    A `ColumnSpec` validated once, with its format spec, empty rendering and ANSI style sequences resolved.
+
+    Must be created through `ColumnSpec.compile`, which caches it for the current color setting.
+    """
+    __slots__ = ("format", "empty", "prefix", "suffix")
+
+    def __init__(self, spec: ColumnSpec) -> None:
+        alignment = spec.alignment
+        match spec.content_type:
+            case CellContentType.TEXT:
+                alignment = TEXT_ALIGNMENT.get(alignment, alignment)
+            case CellContentType.DECIMAL | CellContentType.BASE10:
+                if not spec.precision:
+                    raise CellException(f"{spec.content_type.name} cell must have a precision.")
+
+        if spec.content_type == CellContentType.TEXT or spec.content_type == CellContentType.DIGIT:
+            self.format = f"{alignment.value}{spec.size}{spec.content_type.value}"
+        else:
+            self.format = f"{alignment.value}{spec.size}.{spec.precision}{spec.content_type.value}"
+        self.empty = f"{EMPTY_CONTENT[spec.content_type]:{self.format}}"
+
+        self.prefix = text_style.parse_styles(f"[{spec.style}]") if spec.style else ""
+        self.suffix = text_style.parse_styles("[/]") if spec.style else ""
+
+    def render(self, content: Optional[CellContent]) -> str:
+        # empty cells are never styled
+        if not content:
+            return self.empty
+        return f"{self.prefix}{content:{self.format}}{self.suffix}"
+
+
+@lru_cache(maxsize=1024)
+def _compile_column(spec: ColumnSpec, color: bool) -> CompiledColumn:
+    return CompiledColumn(spec)
+
+
+# TEXT cells have no sign to pad
+TEXT_ALIGNMENT = {
+    CellAlignment.LEFT_SPACE_PADDING: CellAlignment.LEFT,
+    CellAlignment.CENTER_SPACE_PADDING: CellAlignment.CENTER,
+    CellAlignment.RIGHT_SPACE_PADDING: CellAlignment.RIGHT,
+}
+EMPTY_CONTENT = {
+    CellContentType.TEXT: "",
+    CellContentType.DIGIT: 0,
+    CellContentType.DECIMAL: 0.0,
+    CellContentType.BASE10: 0.0,
+}
+
+
+class RowLayout:
+    """
+    Columns of a table compiled once into a format template, rendering rows given as plain tuples of values.
+    """
+    def __init__(self, columns: list[ColumnSpec]) -> None:
+        self.columns = columns
+        self.width = sum(column.size for column in columns)
+        self._compiled: dict[bool, tuple[list[CompiledColumn], str]] = {}
+        self._styled: dict[str, RowLayout] = {}
+
+    def compile(self) -> tuple[list[CompiledColumn], str]:
+        # compiled columns and row template for the current color setting
+        color = text_style.color_enabled()
+        if color not in self._compiled:
+            compiled = [column.compile() for column in self.columns]
+            template = "".join(f"{c.prefix}{{{i}:{c.format}}}{c.suffix}" for i, c in enumerate(compiled)) + "\n"
+            self._compiled[color] = compiled, template
+        return self._compiled[color]
+
+    def render(self, values: tuple) -> str:
+        compiled, template = self.compile()
+        # single format call when no cell is empty
+        if all(values):
+            return template.format(*values)
+        return "".join(column.render(value) for column, value in zip(compiled, values)) + "\n"
+
+    def with_style(self, style: str) -> "RowLayout":
+        # same as Row.add_style, compiled once per style
+        if style not in self._styled:
+            self._styled[style] = RowLayout([replace(column, style=f"{column.style} {style}") for column in self.columns])
+        return self._styled[style]
+
+
+class CompiledRow:
+    """
+    Row of values rendered with a `RowLayout` other than the one of its table (e.g. a styled variant).
+    """
+    __slots__ = ("layout", "values")
+
+    def __init__(self, layout: RowLayout, values: tuple) -> None:
+        self.layout = layout
+        self.values = values
+
+    @property
+    def width(self) -> int:
+        return self.layout.width
+
+    def render(self) -> str:
+        return self.layout.render(self.values)
+
+
 class Cell:
     def __init__(self,
                  content: Optional[CellContent] = None,
@@ -65,32 +183,14 @@ class Cell:
                 if not self.precision:
                     raise CellException("BASE10 cell must have a precision.")
 
+    @property
+    def spec(self) -> ColumnSpec:
+        return ColumnSpec(self.size, self.alignment, self.content_type, self.precision, self.style)
+
     def render(self) -> str:
         # raise exceptions before rendering if the cell object is inconsistent
         self._validate_cell()
-        
-        # create format string
-        if self.content_type == CellContentType.TEXT or self.content_type == CellContentType.DIGIT:
-            format = f"{self.alignment.value}{self.size}{self.content_type.value}"
-        else:
-            format = f"{self.alignment.value}{self.size}.{self.precision}{self.content_type.value}"
-        
-        # early return for empty cell
-        if not self.content:
-            match self.content_type:
-                case CellContentType.TEXT:
-                    return f"{"":{format}}"
-                case CellContentType.DIGIT:
-                    return f"{0:{format}}"
-                case _:
-                    return f"{0.0:{format}}"
-        
-        # Format the cell content
-        cell_content = f"{self.content:{format}}" if self.content else f"{"":{format}}"
-        if self.style:
-            final_string = f"[{self.style}]{cell_content}[/]"
-            return text_style.parse_styles(final_string)
-        return cell_content
+        return self.spec.compile().render(self.content)
     
     def __str__(self) -> str:
         return self.render()
@@ -112,10 +212,7 @@ class Row:
             cell.style += f" {style}"
     
     def render(self) -> str:
-        contents = ""
-        for cell in self.cells:
-            contents += cell.render()
-        return contents + '\n'
+        return "".join(cell.render() for cell in self.cells) + '\n'
     
     def __str__(self) -> str:
         return self.render()
@@ -137,12 +234,15 @@ class Header:
                 raise CellException("Wrong width")
         return width
     
-    def render(self) -> str:
-        header = f"{self.top_char * self.width}\n"
+    def iter_lines(self) -> Iterator[str]:
+        width = self.width
+        yield f"{self.top_char * width}\n"
         for row in self.rows:
-            header += row.render()
-        header += f"{self.bottom_char * self.width}\n"
-        return header
+            yield row.render()
+        yield f"{self.bottom_char * width}\n"
+
+    def render(self) -> str:
+        return "".join(self.iter_lines())
 
     def __str__(self) -> str:
         return self.render()
@@ -239,9 +339,10 @@ class TableRowStyle:
 
 
 class Table:
-    def __init__(self, header: Header, rows: list[Row]) -> None:
+    def __init__(self, header: Header, rows: list[Row] | Iterable[Row | CompiledRow | tuple], layout: Optional[RowLayout] = None) -> None:
         self.header = header
         self.rows = rows
+        self.layout = layout  # renders rows given as tuples of values
         self.set_column_alignment = TableColumnAlignment(self)
         self.set_column_size = TableColumnSize(self)
         self.add_column_style = TableColumnStyle(self)
@@ -271,14 +372,30 @@ class Table:
             if i % 2 == 0:
                 self.add_style_to_content_row(style, i)
 
+    def iter_lines(self) -> Iterator[str]:
+        """
+        Yields the rendered lines of the table, each one ending with a newline.
+
+        Rows are rendered one at a time, so `rows` may be any iterable, such as a generator creating them on demand.
+        """
+        header_width = self.header.width
+        if self.layout and self.layout.width != header_width:
+            raise TableException(f"Row layout has width {self.layout.width} and header has width {header_width}.")
+        yield from self.header.iter_lines()
+        for i, row in enumerate(self.rows):
+            if isinstance(row, tuple):
+                yield self.layout.render(row)
+                continue
+            if row.width != header_width:
+                raise TableException(f"Row {i} has width {row.width} and header has width {header_width}.")
+            yield row.render()
+        yield f"{self.header.top_char * header_width}\n"
+
+    def write(self, stream: TextIO) -> None:
+        stream.writelines(self.iter_lines())
+
     def render(self) -> str:
-        table = self.header.render()
-        for row in self.rows:
-            if row.width != self.header.width:
-                raise TableException(f"Row {self.rows.index(row)} has width {row.width} and header has width {self.header.width}.")
-            table += row.render()
-        table += self.header.top_char * self.header.width
-        return table
+        return "".join(self.iter_lines()).removesuffix("\n")
     
     def __str__(self) -> str:
         return self.render()
@@ -1,8 +1,44 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
 import re
+import sys
 
 import regex_pattern
 
 
+STYLE_MAP = {
+    "/": "\033[0m",
+    "bold": "\033[1m",
+    "dim": "\033[2m",
+    "italic": "\033[3m",
+    "gray": "\033[30m",
+    "red": "\033[31m",
+    "green": "\033[32m",
+    "yellow": "\033[33m",
+    "blue": "\033[34m",
+    "purple": "\033[35m",
+    "cyan": "\033[36m",
+    "white": "\033[37m",
+}
+STYLE_PATTERN = re.compile(regex_pattern.STYLE_REGEX)
+
+# ANSI styles are written only to terminals, `--no-color` turns them off
+# (None until the first styled string, so that stdout is checked after main redirects it)
+color: Optional[bool] = None
+
+
+def color_enabled() -> bool:
+    """
+    Whether ANSI styles are written. Unless set before, it is worked out from stdout on the first call.
+    """
+    global color
+    if color is None:
+        color = sys.stdout.isatty()
+    return color
+
+
+@lru_cache(maxsize=256)
 def fetch_styles(styles: str) -> str:
     """
     Fetch the ANSI styles in a style string, returning a string with the ANSI styles found.
@@ -14,52 +50,46 @@ def fetch_styles(styles: str) -> str:
     if not styles:
         return ""
     
-    split = styles.split(" ")
-    if len(split) == 0:
-        return ""
-    
-    STYLE_MAP = {
-        "/": "\033[0m",
-        "bold": "\033[1m",
-        "dim": "\033[2m",
-        "italic": "\033[3m",
-        "gray": "\033[30m",
-        "red": "\033[31m",
-        "green": "\033[32m",
-        "yellow": "\033[33m",
-        "blue": "\033[34m",
-        "purple": "\033[35m",
-        "cyan": "\033[36m",
-        "white": "\033[37m",
-    }
-
     style_string = ""
-    for s in split:
+    for s in styles.split(" "):
         try:
             style_string += STYLE_MAP[s]
         except KeyError:  # not a style string, return the same input
             return styles
     return style_string
 
+def _substitute_style(match: re.Match) -> str:
+    style = match.group(1)
+    style_string = fetch_styles(style)
+    if style_string == style.strip():  # if is the same string, it is not a style string
+        return match.group(0)
+    return style_string if color_enabled() else ""
+
 def parse_styles(string: str) -> str:
     """
     Parses a string containing styles and returns the string with proper ANSI color styling.
 
     Example:
     `"This is [bold]bold text[/]."` returns `"This is \\033[1mbold text\\033[0m."`
+
+    Without colors, style strings are removed.
     """
-    styles = re.findall(regex_pattern.STYLE_REGEX, string)
-    if len(styles) == 0:
+    if "[" not in string:
         return string
-    
-    m = string
-    for style in styles:
-        style_string = fetch_styles(style)
-        if style_string == style.strip():  # if is the same string, it is not a style string
-            continue
-        m = m.replace(f"[{style}]", style_string, count=1)
-    
-    return m
+    return STYLE_PATTERN.sub(_substitute_style, string)
+
+@contextmanager
+def colors(enabled: bool) -> Iterator[None]:
+    """
+    Enables or disables the ANSI styles inside a `with` block.
+    """
+    global color
+    previous = color
+    color = enabled
+    try:
+        yield
+    finally:
+        color = previous
 
 def printf(string: str):
     """
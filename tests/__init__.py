@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# the tests build their output files with the synthetic writer of the benchmarks, which also puts src/ on sys.path
+BENCHMARKS_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+if str(BENCHMARKS_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCHMARKS_DIR))
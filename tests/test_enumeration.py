@@ -0,0 +1,99 @@
+"""
+Scaling of the enumeration of ranges of atoms: the lookups per atom and the time per atom must stay flat as the
+range doubles, so enumerating a range is linear in its size.
+"""
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import unittest
+
+from synthetic import write_output
+
+from arguments import RangeArgument
+from bootstrap import init_resources
+from output_parser import OutputParser
+from printer import Printer
+
+MAX_ATOMS = 2000
+SIZES = [MAX_ATOMS // 8, MAX_ATOMS // 4, MAX_ATOMS // 2, MAX_ATOMS]
+
+
+class CountingDict(dict):
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.calls = 0
+
+    def get(self, key, default=None):
+        self.calls += 1
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self.calls += 1
+        return super().__getitem__(key)
+
+
+class CountingList(list):
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.calls = 0
+
+    def __getitem__(self, index):
+        self.calls += 1
+        return super().__getitem__(index)
+
+    def __iter__(self):
+        # every item visited by a loop counts as an access
+        for item in super().__iter__():
+            self.calls += 1
+            yield item
+
+
+class EnumerationScalingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_resources()
+        with TemporaryDirectory() as directory, redirect_stdout(StringIO()):
+            filepath = write_output(Path(directory) / "scaling.out", MAX_ATOMS)
+            parser = OutputParser()
+            parser.feed_file(filepath)
+            cls.output = parser.build()
+        cls.printer = Printer(cls.output)
+
+    def enumerate_range(self, n: int) -> list:
+        with redirect_stdout(StringIO()):
+            return self.printer.parse_argument(RangeArgument(f"1-{n}"))
+
+    def test_lookups_per_atom_are_constant(self) -> None:
+        label_index, atoms, offsets = self.output.label_index, self.output.atoms, self.output.orbital_offsets
+        try:
+            per_atom = []
+            for n in SIZES:
+                self.output.label_index = CountingDict(label_index)
+                self.output.atoms = CountingList(atoms)
+                self.output.orbital_offsets = CountingList(offsets)
+                tables = self.enumerate_range(n)
+                self.assertEqual(len(tables), n)
+                calls = self.output.label_index.calls + self.output.atoms.calls + self.output.orbital_offsets.calls
+                per_atom.append(calls / n)
+        finally:
+            self.output.label_index, self.output.atoms, self.output.orbital_offsets = label_index, atoms, offsets
+        self.assertEqual(per_atom, [per_atom[0]] * len(SIZES), "lookups per atom grow with the size of the range")
+
+    def test_time_per_atom_is_bounded(self) -> None:
+        per_atom = []
+        for n in SIZES:
+            # best of three runs, to leave out pauses of the machine
+            times = []
+            for _ in range(3):
+                t0 = perf_counter()
+                self.enumerate_range(n)
+                times.append(perf_counter() - t0)
+            per_atom.append(min(times) / n)
+        # a quadratic enumeration would take 8 times longer per atom on the largest range than on the smallest
+        self.assertLess(per_atom[-1], 3 * per_atom[0], f"time per atom grows with the size of the range: {per_atom}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Ghost elements, basis sets and ECP basis sets resolved through the lookup tables of `OutputParser` must match the
+linear scans of the ghost list, the basis sets and the pseudopotential entries they replaced.
+"""
+from contextlib import redirect_stdout
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from synthetic import write_output
+
+from basis_set import BasisSet
+from bootstrap import init_resources
+from exceptions import GhostException
+from output_parser import OutputParser, LineType
+from periodic_table import PeriodicTable
+
+
+class LinearScanParser(OutputParser):
+    """
+    Parser resolving the atom lines with the linear scans used before the lookup tables.
+    """
+    def _parse_basis_set_line(self, line: str) -> None:
+        line_match = self._get_line_type(line)
+        if line_match.line_type != LineType.AtomLine:
+            return super()._parse_basis_set_line(line)
+
+        new_atom = self._new_atom(line_match.content)
+        if new_atom.element.atomic_number == 0:
+            new_atom.is_ghost = True
+            for (label, atomic_number) in self.ghost_atoms_tuples:
+                if new_atom.label == int(label):
+                    new_atom.element = PeriodicTable.get_element(int(atomic_number))
+                    break
+            if new_atom.element.atomic_number == 0:
+                raise GhostException(f"Unexpected ghost atom found: [purple]Atom {new_atom.label}[/]")
+
+        if self.plan.includes(new_atom.label, new_atom.is_ghost):
+            new_atom.x, new_atom.y, new_atom.z = map(Decimal, line_match.content[2:])
+
+        for basis_set in self.basis_sets:
+            if basis_set.element == new_atom.element:
+                new_atom.basis_set = basis_set
+        if new_atom.basis_set is None:
+            is_pseudo_basis_set = False
+            for pseudo in self.pseudo_basis_sets:
+                if PeriodicTable.get_element(int(pseudo)) == new_atom.element:
+                    is_pseudo_basis_set = True
+                    break
+            new_basis_set = BasisSet(new_atom.element, [], is_pseudo_basis_set)
+            self.basis_sets.append(new_basis_set)
+            new_atom.basis_set = new_basis_set
+        self.atoms.append(new_atom)
+
+
+def atom_fields(output) -> list[tuple]:
+    # the populations do not depend on the lookups, the basis set of an atom is given by its position
+    return [(atom.label, atom.element, atom.is_ghost, atom.x, atom.y, atom.z, output.basis_sets.index(atom.basis_set))
+            for atom in output.atoms]
+
+
+class LookupEquivalenceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_resources()
+
+    def assert_same_output(self, n_atoms: int, **options) -> None:
+        with TemporaryDirectory() as directory, redirect_stdout(StringIO()):
+            filepath = write_output(Path(directory) / "lookups.out", n_atoms, **options)
+            parser = OutputParser()
+            parser.feed_file(filepath)
+            reference = LinearScanParser()
+            reference.feed_file(filepath)
+            output, expected = parser.build(), reference.build()
+
+        self.assertEqual(output.basis_sets, expected.basis_sets)
+        self.assertEqual(atom_fields(output), atom_fields(expected))
+        # atoms of an element share the basis set of that element
+        self.assertTrue(all(any(atom.basis_set is basis_set for basis_set in output.basis_sets) for atom in output.atoms))
+
+    def test_ghost_heavy_output(self) -> None:
+        self.assert_same_output(600, ghosts=500)
+
+    def test_ecp_heavy_output(self) -> None:
+        self.assert_same_output(600, ecp=True)
+
+    def test_ghosts_and_ecps(self) -> None:
+        self.assert_same_output(600, ghosts=300, ecp=True, open_shell=False)
+
+    def test_ghosts_of_ecp_element(self) -> None:
+        # with every atom a ghost, the basis sets (ECP included) are created from the ghost elements
+        self.assert_same_output(30, ghosts=30, ecp=True)
+
+    def test_lookup_tables(self) -> None:
+        with TemporaryDirectory() as directory, redirect_stdout(StringIO()):
+            filepath = write_output(Path(directory) / "lookups.out", 60, ghosts=20, ecp=True)
+            parser = OutputParser()
+            parser.feed_file(filepath)
+
+        self.assertEqual({int(label): PeriodicTable.get_element(int(atomic_number))
+                          for label, atomic_number in reversed(parser.ghost_atoms_tuples)},
+                         parser.ghost_elements)
+        self.assertEqual({basis_set.element.atomic_number: basis_set for basis_set in parser.basis_sets},
+                         parser.basis_set_by_element)
+        self.assertEqual({PeriodicTable.get_element(int(pseudo)).atomic_number for pseudo in parser.pseudo_basis_sets},
+                         parser.pseudo_atomic_numbers)
+        self.assertEqual(len(parser.ghost_elements), 20)
+        self.assertTrue(parser.pseudo_atomic_numbers)
+
+
+if __name__ == "__main__":
+    unittest.main()